@@ -9,6 +9,7 @@ interface AgentScores {
   emotional: number;
   context: number;
   final: number;
+  tier?: 'local' | 'llm';
 }
 
 const SafetyRecorder: React.FC<SafetyRecorderProps> = ({ onCodewordDetected }) => {
@@ -373,7 +374,12 @@ const SafetyRecorder: React.FC<SafetyRecorderProps> = ({ onCodewordDetected }) =
       {/* Multi-Agent Analysis Display */}
       {agentScores && !analyzing && (
         <div className="mb-4 bg-gray-900/50 border border-blue-500 rounded-lg p-4">
-          <p className="text-sm text-blue-300 font-semibold mb-3">🤝 Multi-Agent Analysis Results:</p>
+          <p className="text-sm text-blue-300 font-semibold mb-3">
+            🤝 Multi-Agent Analysis Results:
+            {agentScores.tier === 'local' && (
+              <span className="ml-2 text-xs text-gray-400 font-normal">(local pre-screen, agents not consulted)</span>
+            )}
+          </p>
           <div className="grid grid-cols-2 gap-3">
             <div className="bg-gray-800 p-3 rounded">
               <div className="text-xs text-gray-400">📝 Transcript Agent</div>
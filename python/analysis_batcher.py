@@ -0,0 +1,87 @@
+"""
+Cross-session micro-batching for safety analysis
+Windows that become due at about the same time in different sessions are
+collected for a short interval and scored together in one Gemini request
+"""
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisBatcher:
+    """
+    Collects conversations from many sessions and hands them to score_batch in groups
+    A conversation is any hashable item (the handler submits (text, session summary) pairs);
+    score_batch(conversations) must return one (final_score, agent_breakdown) or
+    Exception per conversation, in order
+    """
+
+    def __init__(self, score_batch, interval=0.1, max_batch=16):
+        self.score_batch = score_batch
+        self.interval = interval
+        self.max_batch = max_batch
+        self.pending = {}  # conversation -> list of futures waiting on it
+        self.flush_handle = None
+
+        self.stats = {
+            'batches': 0,
+            'items': 0,
+            'deduplicated': 0,
+            'failures': 0,
+        }
+
+    async def submit(self, conversation):
+        """Queue a conversation and wait for its (final_score, agent_breakdown)"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiters = self.pending.setdefault(conversation, [])
+        if waiters:
+            # Same text already queued from another session: score it once
+            self.stats['deduplicated'] += 1
+        waiters.append(future)
+
+        if len(self.pending) >= self.max_batch:
+            self._flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.interval, self._flush)
+        return await future
+
+    def _flush(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, {}
+        asyncio.create_task(self._run(batch))
+
+    async def _run(self, batch):
+        conversations = list(batch.keys())
+        self.stats['batches'] += 1
+        self.stats['items'] += len(conversations)
+        logger.info(f"📦 Scoring batch of {len(conversations)} windows")
+
+        try:
+            results = await self.score_batch(conversations)
+        except Exception as e:
+            logger.error(f"Batch analysis error: {e}")
+            self.stats['failures'] += 1
+            results = [e] * len(conversations)
+
+        for conversation, result in zip(conversations, results):
+            for future in batch[conversation]:
+                if future.done():
+                    # Waiting session was stopped while the batch was in flight
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    final_score, agent_breakdown = result
+                    future.set_result((final_score, dict(agent_breakdown)))
+
+    def snapshot(self):
+        return {
+            **self.stats,
+            'avg_batch_size': round(self.stats['items'] / self.stats['batches'], 2) if self.stats['batches'] else 0.0
+        }
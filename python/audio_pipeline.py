@@ -0,0 +1,151 @@
+"""
+Streaming audio decode stage
+One long-running ffmpeg process per session turns the incoming WebM/Opus
+container stream into 16-bit 16 kHz mono PCM frames for the Gemini Live session
+"""
+import asyncio
+import collections
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+PCM_SAMPLE_RATE = 16000
+PCM_MIME_TYPE = f'audio/pcm;rate={PCM_SAMPLE_RATE}'
+BYTES_PER_MS = PCM_SAMPLE_RATE * 2 // 1000  # 16-bit mono
+
+
+def ffmpeg_command():
+    return [
+        os.getenv('FFMPEG_PATH', 'ffmpeg'),
+        '-hide_banner', '-loglevel', 'error',
+        '-i', 'pipe:0',
+        '-vn',  # video chunks share this path; keep only the audio track
+        '-f', 's16le', '-acodec', 'pcm_s16le', '-ac', '1', '-ar', str(PCM_SAMPLE_RATE),
+        'pipe:1'
+    ]
+
+
+class AudioDecoder:
+    """
+    Per-session decoder fed through a pipe (no temp files)
+    Decoding runs in the ffmpeg child process; the event loop only moves bytes.
+    Decoded frames sit in a bounded ring buffer: if the Live session falls behind,
+    the oldest audio is dropped rather than letting memory grow.
+    The first chunk fed (the container header) is kept as `header`, so a replacement
+    decoder can be primed with it via preamble if this process dies mid-stream
+    """
+
+    def __init__(self, on_frame, frame_ms=100, buffer_ms=3000, command=None, preamble=b''):
+        self.on_frame = on_frame  # async callback(pcm_bytes)
+        self.frame_bytes = frame_ms * BYTES_PER_MS
+        self.frames = collections.deque(maxlen=max(1, buffer_ms // frame_ms))
+        self.frame_ready = asyncio.Event()
+        self.command = command or ffmpeg_command()
+        self.process = None
+        self.header = preamble or None
+        self.ready = asyncio.Event()  # set once start() has finished, successfully or not
+        self.tasks = []
+
+        self.stats = {
+            'bytes_in': 0,
+            'frames_out': 0,
+            'frames_dropped': 0,
+        }
+
+    async def start(self):
+        """Launch the decoder process; returns False if it cannot be started"""
+        try:
+            self.process = await asyncio.create_subprocess_exec(
+                *self.command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+        except (FileNotFoundError, PermissionError) as e:
+            logger.error(f"❌ Could not start audio decoder ({self.command[0]}): {e}")
+            return False
+        finally:
+            self.ready.set()
+        if self.header is not None:
+            self.process.stdin.write(self.header)  # before any chunk a waiting feed() writes
+        self.tasks = [
+            asyncio.create_task(self._read_pcm()),
+            asyncio.create_task(self._forward_frames()),
+            asyncio.create_task(self._log_errors()),
+        ]
+        return True
+
+    def buffered_bytes(self):
+        return sum(len(frame) for frame in self.frames)
+
+    @property
+    def running(self):
+        return self.process is not None and self.process.returncode is None
+
+    async def feed(self, chunk):
+        """Write a container chunk to the decoder; waits if the pipe is full (backpressure)"""
+        await self.ready.wait()
+        if not self.running:
+            return False
+        if self.header is None:
+            self.header = bytes(chunk)
+        try:
+            self.process.stdin.write(chunk)
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            logger.error(f"❌ Audio decoder pipe closed: {e}")
+            return False
+        self.stats['bytes_in'] += len(chunk)
+        return True
+
+    async def _read_pcm(self):
+        pending = b''
+        while True:
+            data = await self.process.stdout.read(self.frame_bytes)
+            if not data:
+                break
+            pending += data
+            while len(pending) >= self.frame_bytes:
+                self._push(pending[:self.frame_bytes])
+                pending = pending[self.frame_bytes:]
+        if pending:
+            self._push(pending)
+
+    def _push(self, frame):
+        if len(self.frames) == self.frames.maxlen:
+            self.stats['frames_dropped'] += 1
+        self.frames.append(frame)
+        self.frame_ready.set()
+
+    async def _forward_frames(self):
+        while True:
+            await self.frame_ready.wait()
+            self.frame_ready.clear()
+            while self.frames:
+                frame = self.frames.popleft()
+                try:
+                    await self.on_frame(frame)
+                    self.stats['frames_out'] += 1
+                except Exception as e:
+                    logger.error(f"❌ Error forwarding audio frame: {e}")
+
+    async def _log_errors(self):
+        async for line in self.process.stderr:
+            logger.warning(f"ffmpeg: {line.decode(errors='replace').rstrip()}")
+
+    async def close(self):
+        if self.process is not None and self.process.returncode is None:
+            try:
+                self.process.stdin.close()
+            except Exception:
+                pass
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=2)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
@@ -0,0 +1,144 @@
+"""
+Long-lived notifier for events sent to the Node.js backend
+Keeps one keep-alive connection pool and an outbound priority queue so the
+analysis loop never waits on the backend
+"""
+import asyncio
+import itertools
+import logging
+import time
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Lower number = delivered first
+PRIORITY_ALERT = 0
+PRIORITY_STATUS = 1
+
+# Event types that only carry UI status; a newer one replaces an older pending one
+# (incident updates are cumulative, so the latest pending one says everything)
+STATUS_EVENT_TYPES = ('analysis_started', 'analysis_complete', 'incident_update')
+
+
+class BackendNotifier:
+    def __init__(self, backend_url, workers=2, max_retries=3, retry_backoff=0.25,
+                 request_timeout=5.0, pool_size=16, max_pending=1000, metrics=None):
+        self.endpoint = f'{backend_url}/api/live/codeword-detected'
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.request_timeout = request_timeout
+        self.pool_size = pool_size
+        self.max_pending = max_pending
+        self.metrics = metrics  # optional MetricsRegistry for enqueue-to-delivery latency
+
+        self.http = None
+        self.queue = asyncio.PriorityQueue()
+        self.pending = {}  # key -> (enqueued_at, payload), so queued status events can be coalesced
+        self.worker_tasks = []
+        self._seq = itertools.count()
+
+        self.stats = {
+            'sent': 0,
+            'failed': 0,
+            'retried': 0,
+            'coalesced': 0,
+            'dropped': 0,
+        }
+
+    def start(self):
+        """Open the connection pool and start delivery workers (idempotent, needs a running loop)"""
+        if self.http is not None:
+            return
+        connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+        self.http = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+        )
+        self.worker_tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+        logger.info(f"📮 Backend notifier started ({self.workers} workers) -> {self.endpoint}")
+
+    async def close(self):
+        """Stop workers and close the connection pool"""
+        for task in self.worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self.worker_tasks, return_exceptions=True)
+        self.worker_tasks = []
+        if self.http is not None:
+            await self.http.close()
+            self.http = None
+        self.pending.clear()
+
+    def enqueue(self, data):
+        """Queue an event for delivery; returns immediately"""
+        self.start()
+        event_type = data.get('type')
+
+        if event_type in STATUS_EVENT_TYPES:
+            key = ('status', data.get('session_id'), event_type)
+            if event_type == 'analysis_complete':
+                # A finished analysis makes a not-yet-sent "started" event stale
+                if self.pending.pop(('status', data.get('session_id'), 'analysis_started'), None) is not None:
+                    self.stats['coalesced'] += 1
+            if key in self.pending:
+                # Still waiting to be sent: just swap in the newer payload
+                self.pending[key] = (time.monotonic(), data)
+                self.stats['coalesced'] += 1
+                return
+            if len(self.pending) >= self.max_pending:
+                self.stats['dropped'] += 1
+                logger.warning(f"⚠️  Notifier queue full, dropping {event_type} for {data.get('session_id')}")
+                return
+            priority = PRIORITY_STATUS
+        else:
+            # Alerts are never coalesced or dropped
+            key = ('alert', next(self._seq))
+            priority = PRIORITY_ALERT
+
+        self.pending[key] = (time.monotonic(), data)
+        self.queue.put_nowait((priority, next(self._seq), key))
+
+    async def _worker(self):
+        while True:
+            priority, _, key = await self.queue.get()
+            entry = self.pending.pop(key, None)
+            try:
+                if entry is not None:
+                    enqueued_at, data = entry
+                    attempts = self.max_retries if priority == PRIORITY_ALERT else 1
+                    delivered = await self._deliver(data, attempts)
+                    if delivered and self.metrics is not None:
+                        self.metrics.observe(
+                            'notify_latency_seconds',
+                            time.monotonic() - enqueued_at,
+                            kind='alert' if priority == PRIORITY_ALERT else 'status'
+                        )
+            except Exception as e:
+                logger.error(f"❌ Notifier worker error: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _deliver(self, data, attempts):
+        for attempt in range(1, attempts + 1):
+            try:
+                async with self.http.post(self.endpoint, json=data) as response:
+                    if response.status == 200:
+                        self.stats['sent'] += 1
+                        logger.info(f"✅ Successfully notified backend ({data.get('type', 'alert')})")
+                        return True
+                    logger.error(f"❌ Backend returned status {response.status}")
+                    if response.status < 500:
+                        # 4xx (e.g. WebSocket already closed) will not succeed on retry
+                        break
+            except Exception as e:
+                logger.error(f"❌ Error notifying backend: {e}")
+
+            if attempt < attempts:
+                self.stats['retried'] += 1
+                await asyncio.sleep(self.retry_backoff * (2 ** (attempt - 1)))
+
+        self.stats['failed'] += 1
+        return False
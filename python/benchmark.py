@@ -0,0 +1,404 @@
+"""
+Offline load test for the live stream handler
+Runs create_app() against a local fake Gemini (generate_content, streamed or not, and live.connect with
+configurable latency, jitter and error rate) and a fake Node.js backend, drives N
+synthetic sessions through /session/start, /text, /audio and /stop, and reports
+request latency, detection latency, throughput, memory per session and notification
+delivery times. Needs no network, API key or ffmpeg, so it can run in CI:
+
+    python benchmark.py --sessions 200 --latency 0.4 --jitter 0.2 --error-rate 0.02
+
+Audio is sent as raw 16 kHz PCM through a passthrough decoder. Sessions marked as
+panic sessions send a codeword transcript, a dangerous phrase, and an audio marker the
+fake Live session answers with a trigger_emergency_call; the run exits non-zero if
+any of those detections never reaches the backend.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import sys
+import time
+from array import array
+from types import SimpleNamespace
+
+from aiohttp import web, ClientSession, ClientTimeout
+
+PANIC_CODEWORD = 'help me mom'
+DANGER_PHRASE = "he won't let me leave and I'm scared of him"
+DANGER_MARKERS = ("won't let me leave", 'scared of him')
+BENIGN_PHRASES = [
+    'so how was your weekend',
+    'we should grab dinner sometime',
+    'the traffic was terrible this morning',
+    'did you see the game last night',
+    'I think it might rain later',
+]
+
+# Square-wave amplitudes: both pass the VAD as speech; the fake Live session treats
+# the second as the moment the codeword was spoken
+SPEECH_AMPLITUDE = 8000
+MARKER_AMPLITUDE = 12345
+MARKER_BYTES = array('h', [MARKER_AMPLITUDE] * 4).tobytes()
+
+# Decoder stand-in: copies stdin to stdout as it arrives, so the PCM we send is the PCM we get
+PASSTHROUGH_COMMAND = [
+    sys.executable, '-c',
+    'import sys\n'
+    'while True:\n'
+    '    chunk = sys.stdin.buffer.read1(65536)\n'
+    '    if not chunk:\n'
+    '        break\n'
+    '    sys.stdout.buffer.write(chunk)\n'
+    '    sys.stdout.buffer.flush()\n'
+]
+
+
+def percentiles(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+
+    return {
+        'count': len(ordered),
+        'p50_ms': pick(0.50),
+        'p90_ms': pick(0.90),
+        'p99_ms': pick(0.99),
+        'max_ms': round(ordered[-1] * 1000, 1),
+    }
+
+
+def square_wave(amplitude, duration_ms, period=32):
+    samples = 16 * duration_ms
+    half = period // 2
+    return array('h', [amplitude if (i // half) % 2 == 0 else -amplitude for i in range(samples)]).tobytes()
+
+
+class FakeModels:
+    """Stands in for client.aio.models: a number per agent prompt, JSON for structured output"""
+
+    def __init__(self, fake):
+        self.fake = fake
+
+    async def generate_content(self, model, contents, config=None):
+        await self.fake.delay()
+        text = contents if isinstance(contents, str) else str(contents)
+        danger = any(marker in text.lower() for marker in DANGER_MARKERS)
+        score = 85 if danger else 5
+
+        if config is not None and getattr(config, 'response_mime_type', None) == 'application/json':
+            scores = {'transcript': score, 'emotional': score, 'context': score, 'final': score}
+            if (getattr(config, 'response_schema', None) or {}).get('type') == 'array':
+                # Batched prompt: one result per "[id]" label, scored per conversation line
+                results = []
+                for line in text.splitlines():
+                    if line.startswith('[') and ']' in line:
+                        line_score = 85 if any(m in line.lower() for m in DANGER_MARKERS) else 5
+                        results.append({'id': int(line[1:line.index(']')]), 'transcript': line_score,
+                                        'emotional': line_score, 'context': line_score, 'final': line_score})
+                return SimpleNamespace(text=json.dumps(results))
+            return SimpleNamespace(text=json.dumps({**scores, 'rationale': 'benchmark'}))
+        return SimpleNamespace(text=str(score))
+
+    async def generate_content_stream(self, model, contents, config=None):
+        """
+        Score agents stream: the number, the first explanation tokens a few ms later, and the
+        rest of an unrequested explanation after another full latency (which they should not wait for)
+        """
+        response = await self.generate_content(model, contents, config)
+
+        async def chunks():
+            yield SimpleNamespace(text=response.text)
+            await asyncio.sleep(0.02)
+            yield SimpleNamespace(text='\n\nThe transcript')
+            await asyncio.sleep(self.fake.latency)
+            yield SimpleNamespace(text=' was scored on its literal content.')
+        return chunks()
+
+
+class FakeLiveSession:
+    """Stands in for a Gemini Live session; answers the audio marker with a tool call"""
+
+    def __init__(self, fake):
+        self.fake = fake
+        self.responses = asyncio.Queue()
+        self.bytes_in = 0
+        self.triggered = False
+
+    async def send_realtime_input(self, audio=None, audio_stream_end=None):
+        if audio is None:
+            return
+        self.bytes_in += len(audio.data)
+        if not self.triggered and MARKER_BYTES in audio.data:
+            self.triggered = True
+            asyncio.create_task(self._respond_with_tool_call())
+
+    async def _respond_with_tool_call(self):
+        await self.fake.delay(errors=False)
+        call = SimpleNamespace(
+            id='fc-1',
+            name='trigger_emergency_call',
+            args={'detected_phrase': PANIC_CODEWORD, 'confidence': 0.95, 'timestamp': ''}
+        )
+        await self.responses.put(SimpleNamespace(
+            server_content=None, tool_call=SimpleNamespace(function_calls=[call]), text=None
+        ))
+
+    async def send_tool_response(self, function_responses):
+        pass
+
+    async def receive(self):
+        while True:
+            yield await self.responses.get()
+
+
+class FakeLiveConnect:
+    def __init__(self, fake):
+        self.fake = fake
+
+    async def __aenter__(self):
+        await self.fake.delay()
+        self.fake.stats['live_connects'] += 1
+        return FakeLiveSession(self.fake)
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeGemini:
+    """Replacement for genai.Client with latency = latency +/- jitter seconds and a random error rate"""
+
+    def __init__(self, latency=0.3, jitter=0.1, error_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.stats = {'calls': 0, 'errors': 0, 'live_connects': 0}
+        self.aio = SimpleNamespace(
+            models=FakeModels(self),
+            live=SimpleNamespace(connect=lambda model, config: FakeLiveConnect(self))
+        )
+
+    async def delay(self, errors=True):
+        self.stats['calls'] += 1
+        await asyncio.sleep(max(0.0, self.random.uniform(self.latency - self.jitter, self.latency + self.jitter)))
+        if errors and self.random.random() < self.error_rate:
+            self.stats['errors'] += 1
+            raise RuntimeError('fake Gemini 503 UNAVAILABLE')
+
+
+class FakeBackend:
+    """Records when each notification from the handler arrives"""
+
+    def __init__(self):
+        self.events = []  # (arrived_at, payload)
+
+    async def handle(self, request):
+        self.events.append((time.perf_counter(), await request.json()))
+        return web.json_response({'ok': True})
+
+    def first_detection(self, session_id, source):
+        """When source's detection first reached the backend: as the incident alert or in an incident update"""
+        for arrived_at, data in self.events:
+            if data.get('type') not in (None, 'incident_update') or data.get('session_id') != session_id:
+                continue
+            if source in data.get('sources', [data.get('source')]):
+                return arrived_at
+        return None
+
+
+class Run:
+    def __init__(self, args, base_url):
+        self.args = args
+        self.base_url = base_url
+        self.request_times = {}  # endpoint -> [seconds]
+        self.request_errors = 0
+        self.sent_at = {}  # (session_id, source) -> perf_counter when the trigger was sent
+
+    async def call(self, http, endpoint, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            async with http.post(self.base_url + path, **kwargs) as resp:
+                await resp.read()
+                if resp.status != 200:
+                    self.request_errors += 1
+        except Exception:
+            self.request_errors += 1
+        self.request_times.setdefault(endpoint, []).append(time.perf_counter() - started)
+
+    async def session(self, http, index, panic):
+        args = self.args
+        session_id = f'bench-{index}'
+        rng = random.Random(index)
+        # Spread session starts so they don't all land on the same tick
+        await asyncio.sleep(rng.uniform(0, args.ramp))
+        await self.call(http, 'start', '/session/start', json={'session_id': session_id})
+
+        speech = square_wave(SPEECH_AMPLITUDE, args.chunk_ms)
+        marker = square_wave(MARKER_AMPLITUDE, args.chunk_ms)
+        audio_chunks = args.audio_seconds * 1000 // args.chunk_ms
+        marker_chunk = audio_chunks // 2 if panic else -1
+
+        async def send_audio():
+            for i in range(audio_chunks):
+                if i == marker_chunk:
+                    self.sent_at[(session_id, 'live_tool_call')] = time.perf_counter()
+                await self.call(http, 'audio', f'/session/{session_id}/audio',
+                                data=marker if i == marker_chunk else speech)
+                await asyncio.sleep(args.chunk_ms / 1000 / args.speed)
+
+        async def send_text():
+            for i in range(args.texts):
+                text = rng.choice(BENIGN_PHRASES)
+                if panic and i == args.texts // 2:
+                    text = f'{text} {PANIC_CODEWORD}'
+                    self.sent_at[(session_id, 'local_matcher')] = time.perf_counter()
+                elif panic and i == args.texts // 2 + 1:
+                    text = DANGER_PHRASE
+                    self.sent_at[(session_id, 'window_analysis')] = time.perf_counter()
+                await self.call(http, 'text', f'/session/{session_id}/text', json={'text': text})
+                await asyncio.sleep(args.text_interval / args.speed)
+
+        await asyncio.gather(send_audio(), send_text())
+        # Give the last window and notifications time to flush before stopping
+        await asyncio.sleep(args.drain)
+        await self.call(http, 'stop', f'/session/{session_id}/stop')
+
+
+async def sample_rss(samples, stop):
+    from session_registry import process_rss_bytes
+    while not stop.is_set():
+        samples.append(process_rss_bytes())
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=0.25)
+        except asyncio.TimeoutError:
+            pass
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+async def main(args):
+    backend = FakeBackend()
+    backend_app = web.Application()
+    backend_app.router.add_post('/api/live/codeword-detected', backend.handle)
+    backend_runner = web.AppRunner(backend_app, access_log=None)
+    await backend_runner.setup()
+    backend_port = free_port()
+    await web.TCPSite(backend_runner, '127.0.0.1', backend_port).start()
+
+    # Configure the handler before its module creates handler_instance
+    os.environ['GEMINI_API_KEY'] = 'benchmark'
+    os.environ['BACKEND_URL'] = f'http://127.0.0.1:{backend_port}'
+    os.environ['PANIC_CODEWORD'] = PANIC_CODEWORD
+    os.environ.setdefault('ANALYSIS_MODE', args.mode)
+    import audio_pipeline
+    audio_pipeline.ffmpeg_command = lambda: PASSTHROUGH_COMMAND
+    import live_stream_handler
+    from session_registry import process_rss_bytes
+    logging.getLogger().setLevel(logging.DEBUG if args.verbose else logging.WARNING)
+
+    handler = live_stream_handler.handler_instance
+    fake = FakeGemini(args.latency, args.jitter, args.error_rate, seed=args.seed)
+    handler.client = fake
+
+    runner = web.AppRunner(live_stream_handler.create_app(), access_log=None)
+    await runner.setup()
+    port = free_port()
+    await web.TCPSite(runner, '127.0.0.1', port).start()
+
+    rss_baseline = process_rss_bytes()
+    rss_samples = []
+    stop_sampling = asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(rss_samples, stop_sampling))
+
+    run = Run(args, f'http://127.0.0.1:{port}')
+    panic_count = max(1, round(args.sessions * args.panic_fraction)) if args.panic_fraction > 0 else 0
+    started = time.perf_counter()
+    async with ClientSession(timeout=ClientTimeout(total=60)) as http:
+        await asyncio.gather(*(
+            run.session(http, i, panic=i < panic_count) for i in range(args.sessions)
+        ))
+    elapsed = time.perf_counter() - started
+
+    stop_sampling.set()
+    await sampler
+    metrics = handler.metrics.snapshot()
+    await runner.cleanup()
+    await backend_runner.cleanup()
+
+    detections = {}
+    missed = []
+    for (session_id, source), sent_at in run.sent_at.items():
+        arrived_at = backend.first_detection(session_id, source)
+        if arrived_at is None:
+            missed.append(f'{session_id}:{source}')
+        else:
+            detections.setdefault(source, []).append(arrived_at - sent_at)
+
+    requests = sum(len(times) for times in run.request_times.values())
+    peak_rss = max(rss_samples or [rss_baseline])
+    report = {
+        'config': vars(args),
+        'elapsed_s': round(elapsed, 2),
+        'requests': requests,
+        'requests_per_s': round(requests / elapsed, 1),
+        'request_errors': run.request_errors,
+        'request_latency': {endpoint: percentiles(times) for endpoint, times in run.request_times.items()},
+        'detection_latency': {source: percentiles(times) for source, times in detections.items()},
+        'missed_detections': missed,
+        'notifications_received': len(backend.events),
+        'notify_latency': metrics['histograms'].get('notify_latency_seconds'),
+        'agent_call_latency': metrics['histograms'].get('agent_call_seconds'),
+        'window_latency': metrics['histograms'].get('window_latency_seconds'),
+        'event_loop_lag': metrics['histograms'].get('event_loop_lag_seconds'),
+        'counters': metrics['counters'],
+        'memory': {
+            'rss_baseline_bytes': rss_baseline,
+            'rss_peak_bytes': peak_rss,
+            'rss_per_session_bytes': (peak_rss - rss_baseline) // args.sessions if args.sessions else None,
+        },
+        'fake_gemini': fake.stats,
+    }
+
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+    return 1 if missed else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=50, help='synthetic sessions to run concurrently')
+    parser.add_argument('--texts', type=int, default=12, help='transcript chunks per session')
+    parser.add_argument('--text-interval', type=float, default=1.0, help='seconds between transcript chunks')
+    parser.add_argument('--audio-seconds', type=int, default=10, help='seconds of audio per session')
+    parser.add_argument('--chunk-ms', type=int, default=250, help='audio chunk size')
+    parser.add_argument('--speed', type=float, default=4.0, help='playback speed-up over real time')
+    parser.add_argument('--ramp', type=float, default=2.0, help='seconds over which session starts are spread')
+    parser.add_argument('--drain', type=float, default=3.0, help='seconds to wait before stopping each session')
+    parser.add_argument('--panic-fraction', type=float, default=0.2, help='share of sessions that raise alerts')
+    parser.add_argument('--latency', type=float, default=0.3, help='fake Gemini mean latency (s)')
+    parser.add_argument('--jitter', type=float, default=0.1, help='fake Gemini latency jitter (s)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fake Gemini error probability')
+    parser.add_argument('--mode', default='multi_agent', choices=['multi_agent', 'ensemble', 'batched'],
+                        help='ANALYSIS_MODE when not already set in the environment')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='also write the JSON report here')
+    parser.add_argument('--verbose', action='store_true', help='keep the handler\'s debug logging')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main(parse_args())))
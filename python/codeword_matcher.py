@@ -0,0 +1,180 @@
+"""
+Local streaming codeword matcher
+Checks every transcript phrase against the panic codeword(s) in-process, so a
+spoken or typed codeword is caught without waiting for the LLM agents.
+Only exact token matches are treated as the codeword; phonetic matches (opt-in)
+are near misses for the caller to double-check, not alerts
+"""
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+# Limits on client-supplied per-session codewords
+MAX_SESSION_CODEWORDS = 8
+MAX_CODEWORD_WORDS = 6
+
+_SOUNDEX_CODES = {}
+for _letters, _digit in (('bfpv', '1'), ('cgjkqsxz', '2'), ('dt', '3'),
+                         ('l', '4'), ('mn', '5'), ('r', '6')):
+    for _ch in _letters:
+        _SOUNDEX_CODES[_ch] = _digit
+
+
+def tokenize(text):
+    """Lowercase word tokens with punctuation stripped"""
+    return [t.strip("'") for t in _TOKEN_RE.findall(text.lower()) if t.strip("'")]
+
+
+def validate_codewords(codewords):
+    """
+    Per-session codewords sent by a client: None, or a list of phrases, each a string
+    with 1..MAX_CODEWORD_WORDS words. Returns the list; raises ValueError otherwise (a bare
+    string would otherwise be iterated into single-letter codewords)
+    """
+    if codewords is None:
+        return []
+    if not isinstance(codewords, list):
+        raise ValueError('codewords must be a list of phrases')
+    if len(codewords) > MAX_SESSION_CODEWORDS:
+        raise ValueError(f"at most {MAX_SESSION_CODEWORDS} codewords per session")
+    for phrase in codewords:
+        if not isinstance(phrase, str) or not tokenize(phrase):
+            raise ValueError('each codeword must be a non-empty string')
+        if len(tokenize(phrase)) > MAX_CODEWORD_WORDS:
+            raise ValueError(f"codewords are limited to {MAX_CODEWORD_WORDS} words")
+    return codewords
+
+
+def phonetic_key(token):
+    """Soundex code for a token, so 'mom'/'mum' or 'help'/'halp' compare equal"""
+    if token.isdigit():
+        return token
+    first = token[0]
+    digits = []
+    last = _SOUNDEX_CODES.get(first, '')
+    for ch in token[1:]:
+        code = _SOUNDEX_CODES.get(ch, '')
+        if code and code != last:
+            digits.append(code)
+        if ch not in 'hw':
+            last = code
+    return (first.upper() + ''.join(digits) + '000')[:4]
+
+
+def within_one_edit(a, b):
+    """True if a and b differ by at most one insertion, deletion or substitution"""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
+
+
+class CodewordIndex:
+    """
+    Precompiled Aho-Corasick automaton over word tokens for a set of phrases
+    Immutable once built, so one index can be shared by every session using the same phrases.
+    With fuzzy=True tokens are compared by Soundex code, which is very coarse (mom, man,
+    money and mine share one), so phonetic hits are also required to be within one edit
+    per token
+    """
+
+    def __init__(self, phrases, fuzzy=False):
+        self.fuzzy = fuzzy
+        self.phrases = []  # list of (original phrase, token tuple)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]  # node -> list of phrase indexes ending here
+
+        for phrase in phrases:
+            tokens = tuple(tokenize(phrase))
+            if not tokens or any(tokens == existing for _, existing in self.phrases):
+                continue
+            self.phrases.append((phrase, tokens))
+            self._insert(len(self.phrases) - 1, tokens)
+
+        self.max_len = max((len(tokens) for _, tokens in self.phrases), default=0)
+        self._build_failure_links()
+
+    def key(self, token):
+        return phonetic_key(token) if self.fuzzy else token
+
+    def _insert(self, phrase_idx, tokens):
+        node = 0
+        for token in tokens:
+            k = self.key(token)
+            if k not in self.goto[node]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[node][k] = len(self.goto) - 1
+            node = self.goto[node][k]
+        self.output[node].append(phrase_idx)
+
+    def _build_failure_links(self):
+        queue = list(self.goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for k, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and k not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(k, 0)
+                self.fail[child] = target if target != child else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def step(self, node, token):
+        """Advance the automaton by one token; returns (new node, matched phrase indexes)"""
+        k = self.key(token)
+        while node and k not in self.goto[node]:
+            node = self.fail[node]
+        node = self.goto[node].get(k, 0)
+        return node, self.output[node]
+
+
+class CodewordStream:
+    """
+    Per-session matcher state over an index
+    Keeps the automaton position and the last few tokens between chunks, so a
+    phrase split across two send_text calls still matches
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.node = 0
+        self.recent = []
+
+    def feed(self, text):
+        """Consume a transcript chunk; returns a list of match dicts (usually empty)"""
+        matches = []
+        for token in tokenize(text):
+            self.recent.append(token)
+            if len(self.recent) > self.index.max_len:
+                del self.recent[0]
+            self.node, hits = self.index.step(self.node, token)
+            for phrase_idx in hits:
+                phrase, tokens = self.index.phrases[phrase_idx]
+                heard = tuple(self.recent[-len(tokens):])
+                exact = heard == tokens
+                if not exact and not all(within_one_edit(h, t) for h, t in zip(heard, tokens)):
+                    continue  # same Soundex code but a different word ("help me man")
+                matches.append({
+                    'phrase': phrase,
+                    'heard': ' '.join(heard),
+                    'match_type': 'exact' if exact else 'phonetic',
+                    'confidence': 1.0 if exact else 0.85
+                })
+        return matches
@@ -0,0 +1,245 @@
+"""
+Client-side governor for Gemini requests
+Every agent call and Live connect asks for a slot first: a global in-flight cap,
+a token bucket per model, and priority queues so codeword and high-risk work is
+dispatched ahead of routine periodic windows. Routine requests that wait too long,
+or that overflow the queue, are shed (ShedError) so the caller can merge them into
+the session's next window instead of piling up behind a 429 storm.
+"""
+import asyncio
+import collections
+import contextlib
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Lower number = dispatched first
+PRIORITY_CRITICAL = 0  # codeword / near-certain danger
+PRIORITY_HIGH = 1      # risk-triggered windows, Live connects
+PRIORITY_ROUTINE = 2   # periodic size/age/silence windows, calibration samples
+PRIORITY_NAMES = ('critical', 'high', 'routine')
+
+
+class ShedError(Exception):
+    """A queued request was dropped by the governor before it reached Gemini"""
+
+
+def is_rate_limited(error):
+    """True for Gemini 429 / RESOURCE_EXHAUSTED errors"""
+    if getattr(error, 'code', None) == 429:
+        return True
+    text = str(error)
+    return 'RESOURCE_EXHAUSTED' in text or '429' in text
+
+
+class TokenBucket:
+    """rate tokens per second up to burst; rate None means unlimited (but still pausable)"""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated_at', 'blocked_until')
+
+    def __init__(self, rate=None, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+
+    def wait_time(self, now):
+        """Seconds until a token is available (0 = now)"""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.rate is None:
+            return 0.0
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        if self.rate is not None:
+            self.tokens -= 1
+
+    def pause(self, now, seconds):
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = 0.0
+        self.updated_at = now
+
+
+class _Waiter:
+    __slots__ = ('model', 'priority', 'deadline', 'future', 'enqueued_at')
+
+    def __init__(self, model, priority, deadline, future):
+        self.model = model
+        self.priority = priority
+        self.deadline = deadline
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class GeminiGovernor:
+    """
+    limits maps model -> (requests_per_minute, burst); models not listed are unlimited.
+    max_in_flight 0 means no cap on concurrent requests.
+    Only routine requests are ever shed; critical and high ones wait as long as needed.
+    """
+
+    def __init__(self, max_in_flight=32, limits=None, max_queue=256, metrics=None):
+        self.max_in_flight = max_in_flight
+        self.limits = limits or {}
+        self.max_queue = max_queue
+        self.metrics = metrics  # optional MetricsRegistry for queue wait times
+        self.buckets = {}
+        self.queues = [collections.deque() for _ in PRIORITY_NAMES]
+        self.in_flight = 0
+        self.timer = None
+        self.timer_at = None
+        self._seq = itertools.count()
+
+        self.stats = {
+            'granted': 0,
+            'queued': 0,
+            'shed_stale': 0,
+            'shed_overflow': 0,
+            'throttled': 0,
+        }
+
+    def bucket(self, model):
+        bucket = self.buckets.get(model)
+        if bucket is None:
+            rpm, burst = self.limits.get(model, (0, 1))
+            bucket = TokenBucket(rpm / 60.0 if rpm else None, burst)
+            self.buckets[model] = bucket
+        return bucket
+
+    @contextlib.asynccontextmanager
+    async def slot(self, model, priority=PRIORITY_ROUTINE, max_wait=None):
+        """Hold one in-flight slot (and one rate token) for model while the body runs"""
+        await self.acquire(model, priority, max_wait)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, model, priority=PRIORITY_ROUTINE, max_wait=None):
+        now = time.monotonic()
+        bucket = self.bucket(model)
+        if (self.has_room() and not any(self.queues[:priority + 1])
+                and bucket.wait_time(now) == 0):
+            bucket.take()
+            self.in_flight += 1
+            self.stats['granted'] += 1
+            self._observe_wait(priority, 0.0)
+            return
+
+        deadline = now + max_wait if (max_wait is not None and priority == PRIORITY_ROUTINE) else None
+        waiter = _Waiter(model, priority, deadline, asyncio.get_running_loop().create_future())
+        if not self._make_room(waiter):
+            self.stats['shed_overflow'] += 1
+            raise ShedError('governor queue full')
+        self.queues[priority].append(waiter)
+        self.stats['queued'] += 1
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+                # Granted just as the caller gave up: hand the slot back
+                self.release()
+            raise
+        self._observe_wait(priority, time.monotonic() - waiter.enqueued_at)
+
+    def try_acquire(self, model):
+        """Take a slot only if one is free right now and nothing is queued (hedged requests)"""
+        bucket = self.bucket(model)
+        if not self.has_room() or self.queued() or bucket.wait_time(time.monotonic()) > 0:
+            return False
+        bucket.take()
+        self.in_flight += 1
+        self.stats['granted'] += 1
+        return True
+
+    def has_room(self):
+        return not self.max_in_flight or self.in_flight < self.max_in_flight
+
+    def release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def throttle(self, model, seconds):
+        """Gemini said 429: hold back every request for this model for a while"""
+        self.stats['throttled'] += 1
+        self.bucket(model).pause(time.monotonic(), seconds)
+        logger.warning(f"🚦 Gemini rate limited {model}; pausing it for {seconds:.1f}s")
+
+    def queued(self):
+        return sum(len(queue) for queue in self.queues)
+
+    def _make_room(self, waiter):
+        """Enforce max_queue by shedding the oldest routine waiter; False if waiter itself must go"""
+        if self.queued() < self.max_queue:
+            return True
+        routine = self.queues[PRIORITY_ROUTINE]
+        while routine:
+            oldest = routine.popleft()
+            if not oldest.future.done():
+                self.stats['shed_overflow'] += 1
+                oldest.future.set_exception(ShedError('shed for higher-priority or newer work'))
+                return True
+        # Nothing routine left to drop; critical/high work is never refused
+        return waiter.priority != PRIORITY_ROUTINE
+
+    def _dispatch(self):
+        now = time.monotonic()
+        retry_at = None
+
+        for queue in self.queues:
+            blocked = collections.deque()
+            while queue:
+                waiter = queue.popleft()
+                if waiter.future.done():
+                    continue  # cancelled by its caller
+                if waiter.deadline is not None and now >= waiter.deadline:
+                    self.stats['shed_stale'] += 1
+                    waiter.future.set_exception(ShedError('waited too long for a Gemini slot'))
+                    continue
+                if not self.has_room():
+                    blocked.append(waiter)
+                    continue
+                bucket = self.bucket(waiter.model)
+                wait = bucket.wait_time(now)
+                if wait > 0:
+                    blocked.append(waiter)
+                    retry_at = min(retry_at or now + wait, now + wait)
+                    continue
+                bucket.take()
+                self.in_flight += 1
+                self.stats['granted'] += 1
+                waiter.future.set_result(None)
+            queue.extend(blocked)
+
+        # Wake up again when a bucket refills or the next routine deadline passes
+        deadlines = [w.deadline for w in self.queues[PRIORITY_ROUTINE] if w.deadline is not None]
+        if deadlines:
+            retry_at = min(retry_at or min(deadlines), min(deadlines))
+        if retry_at is not None and (self.timer_at is None or retry_at < self.timer_at):
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer_at = retry_at
+            self.timer = asyncio.get_running_loop().call_later(max(0.0, retry_at - now), self._on_timer)
+
+    def _on_timer(self):
+        self.timer = None
+        self.timer_at = None
+        self._dispatch()
+
+    def _observe_wait(self, priority, seconds):
+        if self.metrics is not None:
+            self.metrics.observe('governor_wait_seconds', seconds, priority=PRIORITY_NAMES[priority])
+
+    def snapshot(self):
+        return {
+            **self.stats,
+            'in_flight': self.in_flight,
+            'waiting': {name: len(queue) for name, queue in zip(PRIORITY_NAMES, self.queues)},
+        }
@@ -0,0 +1,98 @@
+"""
+Per-session danger incidents
+Every detection source (Live tool call, window analysis, local codeword matcher)
+reports into the session's current incident instead of alerting on its own. The
+first detection opens the incident and goes out as the one alert (the backend
+places one call per incident_id); later detections become incident updates until
+the incident has been quiet for the cooldown.
+"""
+import os
+import time
+import uuid
+
+# What a detection did to the session's incident
+OPENED = 'opened'        # new incident: send the alert
+UPDATED = 'updated'      # merged, and worth telling the backend about (new source, higher confidence, or periodic)
+SUPPRESSED = 'suppressed'  # merged silently
+DUPLICATE = 'duplicate'  # this exact detection was already counted
+
+
+class Incident:
+    """One danger episode in a session"""
+
+    __slots__ = ('incident_id', 'opened_at', 'last_detection_at', 'last_update_at', 'sources',
+                 'confidence', 'detections', 'sequence', 'seen')
+
+    def __init__(self, source, confidence, now):
+        self.incident_id = uuid.uuid4().hex
+        self.opened_at = now
+        self.last_detection_at = now
+        self.last_update_at = now
+        self.sources = {source}
+        self.confidence = confidence
+        self.detections = 1
+        self.sequence = 0  # incremented per update sent
+        self.seen = set()  # detection ids already merged (e.g. Live function call ids)
+
+    def describe(self):
+        """Fields shared by the alert and every update for this incident"""
+        return {
+            'incident_id': self.incident_id,
+            'sources': sorted(self.sources),
+            'detections': self.detections,
+            'peak_confidence': self.confidence,
+        }
+
+
+class IncidentPolicy:
+    """
+    cooldown: seconds without a detection after which the next one opens a new incident
+    update_interval: minimum gap between updates that add nothing but another detection
+    min_confidence_step: confidence gain that is worth an update on its own
+    """
+
+    def __init__(self, cooldown=120.0, update_interval=15.0, min_confidence_step=0.05):
+        self.cooldown = cooldown
+        self.update_interval = update_interval
+        self.min_confidence_step = min_confidence_step
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            cooldown=float(os.getenv('INCIDENT_COOLDOWN_SECONDS', '120')),
+            update_interval=float(os.getenv('INCIDENT_UPDATE_INTERVAL_SECONDS', '15')),
+        )
+
+    def is_active(self, incident, now=None):
+        now = time.monotonic() if now is None else now
+        return incident is not None and now - incident.last_detection_at < self.cooldown
+
+    def detect(self, incident, source, confidence, detection_id=None, now=None):
+        """
+        Fold one detection into the session's incident
+        Returns (action, incident); the caller stores incident back on the session
+        """
+        now = time.monotonic() if now is None else now
+        if not self.is_active(incident, now):
+            incident = Incident(source, confidence, now)
+            if detection_id is not None:
+                incident.seen.add(detection_id)
+            return OPENED, incident
+
+        if detection_id is not None:
+            if detection_id in incident.seen:
+                return DUPLICATE, incident
+            incident.seen.add(detection_id)
+
+        new_source = source not in incident.sources
+        stronger = confidence >= incident.confidence + self.min_confidence_step
+        incident.sources.add(source)
+        incident.confidence = max(incident.confidence, confidence)
+        incident.detections += 1
+        incident.last_detection_at = now
+
+        if new_source or stronger or now - incident.last_update_at >= self.update_interval:
+            incident.sequence += 1
+            incident.last_update_at = now
+            return UPDATED, incident
+        return SUPPRESSED, incident
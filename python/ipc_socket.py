@@ -0,0 +1,321 @@
+"""
+Unix domain socket transport between the Node backend and this service
+Both processes run on the same host, so instead of a loopback HTTP request per
+audio chunk and a POST per event, one socket carries commands and media in and
+events out. Every frame is
+
+    u8 codec | u32 header length | u32 payload length | header | payload
+
+where the header is a small map (msgpack when both sides have it, else JSON) and
+the payload is raw media bytes, so audio is never base64'd or parsed as JSON.
+It runs alongside the aiohttp routes; either transport can drive a session.
+"""
+import asyncio
+import json
+import logging
+import os
+import stat
+import struct
+
+try:
+    import msgpack
+except ImportError:  # JSON headers still work; the Node side negotiates down in hello
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+PREFIX = struct.Struct('>BII')
+CODEC_JSON = 0
+CODEC_MSGPACK = 1
+CODEC_NAMES = {CODEC_JSON: 'json', CODEC_MSGPACK: 'msgpack'}
+
+
+class FrameError(Exception):
+    """A frame that can't be decoded; the connection is dropped"""
+
+
+def encode_frame(header, payload=b'', codec=CODEC_JSON):
+    if codec == CODEC_MSGPACK:
+        body = msgpack.packb(header, use_bin_type=True)
+    else:
+        body = json.dumps(header, separators=(',', ':')).encode()
+    return PREFIX.pack(codec, len(body), len(payload)) + body + bytes(payload)
+
+
+def decode_header(codec, body):
+    if codec == CODEC_MSGPACK and msgpack is not None:
+        header = msgpack.unpackb(body, raw=False)
+    elif codec == CODEC_JSON:
+        header = json.loads(body)
+    else:
+        raise FrameError(f"unsupported codec {codec}")
+    if not isinstance(header, dict):
+        raise FrameError('frame header is not a map')
+    return header
+
+
+async def read_frame(reader, max_frame):
+    """(codec, header, payload), or None at a clean end of stream"""
+    try:
+        prefix = await reader.readexactly(PREFIX.size)
+    except asyncio.IncompleteReadError as e:
+        if e.partial:
+            raise FrameError('truncated frame prefix')
+        return None
+    codec, header_len, payload_len = PREFIX.unpack(prefix)
+    if header_len + payload_len > max_frame:
+        raise FrameError(f"frame of {header_len + payload_len} bytes exceeds {max_frame}")
+    data = await reader.readexactly(header_len + payload_len)
+    try:
+        header = decode_header(codec, data[:header_len])
+    except ValueError as e:
+        raise FrameError(f"bad frame header: {e}")
+    return codec, header, data[header_len:]
+
+
+class IpcConnection:
+    """
+    One connected backend process
+    Commands for a session run in order on that session's lane, while different
+    sessions proceed independently (a slow Live connect doesn't hold up other
+    sessions' audio); a full lane stops the reader, which backpressures the sender.
+    A lane goes away once it has drained and its session is no longer registered
+    """
+
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.codec = CODEC_JSON  # replies and events use the codec of the peer's last frame
+        self.lanes = {}  # session_id -> (queue, task)
+        self.subscribed = False
+
+    async def serve(self):
+        try:
+            while True:
+                frame = await read_frame(self.reader, self.server.max_frame)
+                if frame is None:
+                    break
+                self.codec, header, payload = frame
+                op = header.get('op')
+                self.server.stats['frames_in'] += 1
+                if op == 'hello':
+                    await self._hello(header)
+                    continue
+                session_id = header.get('session_id')
+                if op not in self.server.handlers or not session_id:
+                    await self.reply(header, {'status': 'error', 'error': f"Bad command: {op}"})
+                    continue
+                await self._lane(session_id).put((op, header, payload))
+        except FrameError as e:
+            logger.error(f"❌ IPC protocol error, dropping connection: {e}")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            await self.close()
+
+    async def _hello(self, header):
+        """Codec negotiation and event subscription"""
+        if header.get('events'):
+            self.server.subscribe(self)
+        await self.reply(header, {
+            'status': 'ok',
+            'codecs': [name for codec, name in CODEC_NAMES.items() if codec != CODEC_MSGPACK or msgpack],
+            'max_frame': self.server.max_frame,
+        })
+
+    def _lane(self, session_id):
+        lane = self.lanes.get(session_id)
+        if lane is None:
+            queue = asyncio.Queue(maxsize=self.server.lane_size)
+            lane = (queue, asyncio.create_task(self._run_lane(session_id, queue)))
+            self.lanes[session_id] = lane
+        return lane[0]
+
+    async def _run_lane(self, session_id, queue):
+        while True:
+            item = await queue.get()
+            if item is not None:  # None just asks the lane to check whether it's still needed
+                op, header, payload = item
+                try:
+                    result = await self.server.handlers[op](session_id, header, payload)
+                except Exception as e:
+                    logger.error(f"❌ IPC {op} failed for {session_id}: {e}")
+                    result = {'status': 'error', 'error': str(e), 'session_id': session_id}
+                await self.reply(header, result)
+            # Stopped, reaped, stopped over HTTP, or never started
+            if queue.empty() and session_id not in self.server.handler.sessions:
+                self.lanes.pop(session_id, None)
+                return
+
+    def forget(self, session_id):
+        """The session has ended; let its lane (if idle) notice and exit"""
+        lane = self.lanes.get(session_id)
+        if lane is not None and lane[0].empty():
+            lane[0].put_nowait(None)
+
+    async def reply(self, request, result):
+        """
+        Answer a command that carried an id; commands without one are fire-and-forget
+        A reply is never dropped (the backend would wait out its request timeout): past
+        the buffer limit this waits for the backend to read, which holds up the lane
+        """
+        if request.get('id') is None or self.writer.transport.is_closing():
+            return
+        self._write({'op': 'reply', 'id': request['id'], **result})
+        if self.writer.transport.get_write_buffer_size() > self.server.max_buffered:
+            try:
+                await self.writer.drain()
+            except ConnectionError:
+                pass
+
+    def send(self, header, payload=b''):
+        """Write one frame; False if the connection is gone or its buffer is over the limit"""
+        transport = self.writer.transport
+        if transport.is_closing() or transport.get_write_buffer_size() > self.server.max_buffered:
+            return False
+        self._write(header, payload)
+        return True
+
+    def _write(self, header, payload=b''):
+        self.writer.write(encode_frame(header, payload, self.codec))
+        self.server.stats['frames_out'] += 1
+
+    async def close(self):
+        self.server.unsubscribe(self)
+        tasks = [task for _, task in self.lanes.values()]
+        self.lanes.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.writer.close()
+
+
+class IpcServer:
+    """
+    Listens on a Unix socket and drives the handler's session methods
+    Commands: start {session_id, codewords?}, audio / video {session_id} + payload,
+    text {session_id, text}, stop {session_id}; with an 'id' they get a reply
+    mirroring the HTTP endpoint's JSON. A connection that sends hello {events: true}
+    becomes the event sink: notify_backend sends {op: 'event', event} frames to it
+    instead of POSTing status events to the backend, until it disconnects. Alerts are
+    sent on it too but still go through the HTTP notifier, since a write here has no ack.
+    """
+
+    def __init__(self, handler, path, max_frame=4 * 1024 * 1024, lane_size=64, max_buffered=1024 * 1024):
+        self.handler = handler
+        self.path = path
+        self.max_frame = max_frame
+        self.lane_size = lane_size
+        self.max_buffered = max_buffered
+        self.server = None
+        self.connections = set()
+        self.subscriber = None
+        self.handlers = {
+            'start': self._start,
+            'audio': self._audio,
+            'video': self._video,
+            'text': self._text,
+            'stop': self._stop,
+        }
+
+        self.stats = {
+            'connections': 0,
+            'frames_in': 0,
+            'frames_out': 0,
+            'events_sent': 0,
+            'events_fallback': 0,
+        }
+
+    async def start(self):
+        if self.server is not None:
+            return
+        try:
+            if stat.S_ISSOCK(os.stat(self.path).st_mode):
+                os.unlink(self.path)  # left behind by a previous run
+        except FileNotFoundError:
+            pass
+        self.server = await asyncio.start_unix_server(self._on_connect, path=self.path)
+        os.chmod(self.path, 0o600)
+        logger.info(f"🔌 IPC socket listening on {self.path} (msgpack: {'yes' if msgpack else 'no, JSON headers'})")
+
+    async def _on_connect(self, reader, writer):
+        connection = IpcConnection(self, reader, writer)
+        self.connections.add(connection)
+        self.stats['connections'] += 1
+        logger.info("🔌 Backend connected over IPC socket")
+        try:
+            await connection.serve()
+        finally:
+            self.connections.discard(connection)
+            logger.info("🔌 Backend IPC connection closed")
+
+    def subscribe(self, connection):
+        self.subscriber = connection
+        connection.subscribed = True
+
+    def unsubscribe(self, connection):
+        connection.subscribed = False
+        if self.subscriber is connection:
+            self.subscriber = None
+
+    def forget(self, session_id):
+        """Called when a session stops by any route, so no lane outlives it"""
+        for connection in self.connections:
+            connection.forget(session_id)
+
+    def emit(self, data):
+        """Send an event to the subscribed backend; False means deliver it another way"""
+        if self.subscriber is None:
+            return False
+        if self.subscriber.send({'op': 'event', 'event': data}):
+            self.stats['events_sent'] += 1
+            return True
+        self.stats['events_fallback'] += 1
+        return False
+
+    async def _start(self, session_id, header, payload):
+        try:
+            started = await self.handler.start_session(session_id, header.get('codewords'))
+        except ValueError as e:
+            return {'status': 'error', 'error': str(e), 'session_id': session_id}
+        if started:
+            return {'status': 'session_started', 'session_id': session_id}
+        return {'status': 'error', 'error': 'Failed to start session', 'session_id': session_id}
+
+    async def _audio(self, session_id, header, payload):
+        success = await self.handler.send_audio(session_id, payload)
+        return {'status': 'success' if success else 'error', 'session_id': session_id}
+
+    async def _video(self, session_id, header, payload):
+        success = await self.handler.send_video(session_id, payload)
+        return {'status': 'success' if success else 'error', 'session_id': session_id}
+
+    async def _text(self, session_id, header, payload):
+        success = await self.handler.send_text(session_id, header.get('text', ''))
+        return {'status': 'success' if success else 'error', 'session_id': session_id}
+
+    async def _stop(self, session_id, header, payload):
+        await self.handler.stop_session(session_id)
+        return {'status': 'session_stopped', 'session_id': session_id}
+
+    async def close(self):
+        if self.server is None:
+            return
+        self.server.close()
+        for connection in list(self.connections):
+            await connection.close()
+        await self.server.wait_closed()
+        self.server = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def snapshot(self):
+        return {
+            **self.stats,
+            'path': self.path,
+            'connected': len(self.connections),
+            'subscribed': self.subscriber is not None,
+        }
@@ -0,0 +1,147 @@
+"""
+Pool of pre-connected Gemini Live sessions
+Keeps a few sessions already through the WebSocket handshake so a session's
+first audio chunk does not wait for it, but only while media sessions exist;
+connections are recycled before the server-side session lifetime runs out
+"""
+import asyncio
+import collections
+import logging
+import time
+
+from window_scheduler import wait_event
+
+logger = logging.getLogger(__name__)
+
+
+class PooledConnection:
+    __slots__ = ('session', 'context_manager', 'created_at')
+
+    def __init__(self, session, context_manager):
+        self.session = session
+        self.context_manager = context_manager
+        self.created_at = time.monotonic()
+
+
+class LiveConnectionPool:
+    """
+    connect() must return (session, context_manager) for a freshly opened Live connection.
+    acquire() hands out a warm connection instantly when one is available and falls
+    back to connecting inline otherwise; the pool refills itself in the background.
+    demand() says whether anything may want a connection soon: while it is false the
+    pool closes its warm connections and opens none, so an idle service holds no sockets.
+    A handed-out connection that the server already closed fails on first use; the
+    caller drops it, calls discard_idle() (the rest of the pool likely went with it)
+    and acquires another.
+    """
+
+    def __init__(self, connect, target_size=2, max_age=480.0, check_interval=15.0, demand=None):
+        self.connect = connect
+        self.target_size = target_size
+        self.demand = demand
+        self.max_age = max_age
+        self.check_interval = check_interval
+        self.idle = collections.deque()
+        self.connecting = 0
+        self.consecutive_failures = 0
+        self.refill_needed = asyncio.Event()
+        self.task = None
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'opened': 0,
+            'recycled': 0,
+            'connect_errors': 0,
+        }
+
+    def start(self):
+        """Start the background refill/health loop (idempotent, needs a running loop)"""
+        if self.task is None and self.target_size > 0:
+            self.task = asyncio.create_task(self._maintain())
+            self.refill_needed.set()
+            logger.info(f"🏊 Live connection pool started (up to {self.target_size} warm sessions while media sessions exist)")
+
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        while self.idle:
+            await self._discard(self.idle.popleft())
+
+    async def acquire(self):
+        """Return (session, context_manager), warm if possible"""
+        now = time.monotonic()
+        while self.idle:
+            conn = self.idle.popleft()
+            self.refill_needed.set()
+            if now - conn.created_at < self.max_age:
+                self.stats['hits'] += 1
+                return conn.session, conn.context_manager
+            self.stats['recycled'] += 1
+            asyncio.create_task(self._discard(conn))
+
+        self.stats['misses'] += 1
+        self.refill_needed.set()
+        return await self.connect()
+
+    def discard_idle(self):
+        """Close every warm connection and refill with fresh ones"""
+        while self.idle:
+            self.stats['recycled'] += 1
+            asyncio.create_task(self._discard(self.idle.popleft()))
+        self.refill_needed.set()
+
+    async def _open_one(self):
+        # self.connecting was incremented by the caller when this task was created
+        try:
+            session, context_manager = await self.connect()
+            self.idle.append(PooledConnection(session, context_manager))
+            self.stats['opened'] += 1
+            self.consecutive_failures = 0
+        except Exception as e:
+            self.stats['connect_errors'] += 1
+            self.consecutive_failures += 1
+            logger.error(f"❌ Live pool connect failed: {e}")
+            # Back off a little so a Gemini outage does not become a reconnect storm
+            await asyncio.sleep(min(30.0, 2.0 * self.consecutive_failures))
+        finally:
+            self.connecting -= 1
+
+    async def _discard(self, conn):
+        try:
+            await conn.context_manager.__aexit__(None, None, None)
+        except Exception as e:
+            logger.debug(f"Error closing pooled Live session: {e}")
+
+    async def _maintain(self):
+        while True:
+            await wait_event(self.refill_needed, self.check_interval)
+            self.refill_needed.clear()
+
+            # Recycle connections close to the server-side lifetime, and all of them once
+            # no session wants one
+            target = self.target_size if self.demand is None or self.demand() else 0
+            now = time.monotonic()
+            kept = collections.deque()
+            while self.idle:
+                conn = self.idle.popleft()
+                if len(kept) < target and now - conn.created_at < self.max_age:
+                    kept.append(conn)
+                else:
+                    self.stats['recycled'] += 1
+                    asyncio.create_task(self._discard(conn))
+            self.idle = kept
+
+            missing = target - len(self.idle) - self.connecting
+            for _ in range(max(0, missing)):
+                self.connecting += 1
+                asyncio.create_task(self._open_one())
+
+    def snapshot(self):
+        return {
+            **self.stats,
+            'warm': len(self.idle),
+            'connecting': self.connecting,
+        }
@@ -5,14 +5,40 @@ Runs as a standalone service that the Node.js backend communicates with
 import asyncio
 import os
 import json
+import random
+import sys
+import time
+from collections import OrderedDict
 from google import genai
 from google.genai import types
 from dotenv import load_dotenv
-from aiohttp import web
+from aiohttp import web, WSMsgType
 from aiohttp_cors import setup as cors_setup, ResourceOptions
 import logging
-import subprocess
-import tempfile
+from datetime import datetime, timezone
+
+from backend_notifier import BackendNotifier
+from codeword_matcher import CodewordIndex, CodewordStream, validate_codewords
+from windowing import TranscriptWindow, WindowPolicy
+from verdict_cache import VerdictCache
+from analysis_batcher import AnalysisBatcher
+from prescorer import LexiconPrescorer
+from stream_socket import SessionStream
+from audio_pipeline import AudioDecoder, PCM_MIME_TYPE
+from vad import VoiceActivityGate
+from session_registry import Session, SessionRegistry
+from session_context import SessionContext
+from score_parser import ScoreStream, parse_score
+from incidents import IncidentPolicy, OPENED, UPDATED
+from ipc_socket import IpcServer
+from window_scheduler import WindowScheduler
+from live_pool import LiveConnectionPool
+from metrics import MetricsRegistry, LoopLagProbe
+from gemini_governor import (
+    GeminiGovernor, ShedError, is_rate_limited,
+    PRIORITY_CRITICAL, PRIORITY_HIGH, PRIORITY_ROUTINE, PRIORITY_NAMES
+)
+from shard_router import ShardRouter, create_router_app
 
 # Configure logging
 logging.basicConfig(
@@ -24,6 +50,47 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv('../.env.local')
 
+# Structured output for ensemble mode: all four agent scores in one response
+ENSEMBLE_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "transcript": {"type": "integer"},
+        "emotional": {"type": "integer"},
+        "context": {"type": "integer"},
+        "final": {"type": "integer"},
+        "rationale": {"type": "string"}
+    },
+    "required": ["transcript", "emotional", "context", "final"]
+}
+
+# Specialists run in parallel by the multi-agent mode, with the names their errors are logged under
+SPECIALIST_AGENTS = {
+    'transcript': 'Transcript analyzer',
+    'emotional': 'Emotional detector',
+    'context': 'Context interpreter',
+}
+
+# Structured output for batched mode: one ensemble result per labeled conversation
+BATCH_RESPONSE_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "id": {"type": "integer"},
+            **ENSEMBLE_RESPONSE_SCHEMA["properties"]
+        },
+        "required": ["id", "transcript", "emotional", "context", "final"]
+    }
+}
+
+def _worker_share(name, default, shares):
+    """One worker's part of a service-wide limit from the env (0 stays 0 = unlimited; never below 1)"""
+    limit = int(os.getenv(name, default))
+    if limit <= 0 or shares <= 1:
+        return limit
+    return max(1, limit // shares)
+
+
 class LiveStreamHandler:
     def __init__(self):
         self.api_key = os.getenv('GEMINI_API_KEY')
@@ -31,28 +98,284 @@ class LiveStreamHandler:
         self.backend_url = os.getenv('BACKEND_URL', 'http://localhost:3001')
         self.client = genai.Client(api_key=self.api_key)
         self.model = "gemini-2.5-flash-native-audio-preview-09-2025"
-        self.active_sessions = {}
-        self.transcript_buffers = {}  # Store 10-second buffers per session
-        self.buffer_tasks = {}  # Background tasks for buffer processing
+        self.sessions = SessionRegistry()  # session_id -> Session (all per-session state)
+        self.metrics = MetricsRegistry()  # served on /metrics
+        self.loop_probe = LoopLagProbe(self.metrics)
+        # Warm Live connections so a session's first audio doesn't wait for the WebSocket handshake;
+        # kept only while some session has sent media within the Live idle timeout
+        self.live_pool = LiveConnectionPool(
+            self._connect_live,
+            target_size=int(os.getenv('LIVE_POOL_SIZE', '2')),
+            max_age=float(os.getenv('LIVE_POOL_MAX_AGE_SECONDS', '480')),
+            demand=lambda: self.sessions.has_media_since(time.monotonic() - self.live_idle_seconds)
+        )
+        self.window_policy = WindowPolicy.from_env()
+        # One timer heap + worker pool flushes every session's window and reaps idle sessions
+        self.scheduler = WindowScheduler(
+            process=self._process_window,
+            reap=self.stop_session,
+            idle_candidates=self.sessions.idle_since,
+            workers=int(os.getenv('SCHEDULER_WORKERS', '32')),
+            idle_ttl=float(os.getenv('SESSION_IDLE_TTL_SECONDS', '900')),
+            sweep=self._close_idle_live,
+            # Codeword and risk windows are handed out first; codeword near misses also get a
+            # few extra tasks so they don't wait behind windows holding every worker at the governor
+            priority=self._window_priority,
+            urgent_priority=PRIORITY_CRITICAL,
+            max_overflow=int(os.getenv('SCHEDULER_URGENT_OVERFLOW', '8'))
+        )
+        # Live connections are opened on the first audio/video chunk and closed after this much media silence
+        self.live_idle_seconds = float(os.getenv('LIVE_MEDIA_IDLE_SECONDS', '60'))
+        self.live_retry_seconds = float(os.getenv('LIVE_CONNECT_RETRY_SECONDS', '5'))
+        self.vad_enabled = os.getenv('VAD_ENABLED', 'true').lower() == 'true'
+        # Times a session's ffmpeg decoder is replaced after exiting before its audio is given up on
+        self.decoder_max_restarts = int(os.getenv('AUDIO_DECODER_MAX_RESTARTS', '3'))
+        self.notifier = BackendNotifier(
+            self.backend_url,
+            max_retries=int(os.getenv('NOTIFY_MAX_RETRIES', '3')),
+            metrics=self.metrics
+        )
+
+        # Agent execution: async client calls, per-call timeout, and a governor that caps
+        # in-flight requests, rate-limits each model and serves urgent windows first
+        self.agent_model = os.getenv('AGENT_MODEL', 'gemini-2.5-flash')
+        self.agent_timeout = float(os.getenv('AGENT_TIMEOUT_SECONDS', '8'))
+        # Limits are for the whole service: a sharded worker (spawned by the router with
+        # PYTHON_WORKERS in its env) enforces its 1/N share so N workers stay within them
+        shares = int(os.getenv('PYTHON_WORKERS', '1')) if os.getenv('WORKER_PORT') else 1
+        self.governor = GeminiGovernor(
+            max_in_flight=_worker_share('AGENT_MAX_CONCURRENCY', '32', shares),
+            limits={
+                self.agent_model: (_worker_share('AGENT_RPM', '1000', shares), _worker_share('AGENT_BURST', '20', shares)),
+                self.model: (_worker_share('LIVE_CONNECT_RPM', '0', shares), _worker_share('LIVE_CONNECT_BURST', '5', shares)),
+            },
+            max_queue=int(os.getenv('GOVERNOR_MAX_QUEUE', '256')),
+            metrics=self.metrics
+        )
+        # Routine windows queued longer than this are shed and merged into the session's next window
+        self.routine_max_wait = float(os.getenv('GOVERNOR_ROUTINE_MAX_WAIT_SECONDS', '10'))
+        self.rate_limit_retries = int(os.getenv('GOVERNOR_RATE_LIMIT_RETRIES', '2'))
+        self.rate_limit_pause = float(os.getenv('GOVERNOR_RATE_LIMIT_PAUSE_SECONDS', '2'))
+        # Escalations whose local pre-score is at least this (e.g. the codeword) get critical priority
+        self.critical_prescore = int(os.getenv('GOVERNOR_CRITICAL_PRESCORE', '70'))
+        # Multi-agent execution policy: a specialist at or above the early-exit score decides the
+        # window at once (0 disables); specialists within the agreement tolerance skip the assessor
+        # (-1 disables); calls slower than the hedge delay get a duplicate on the hedge model (0 disables)
+        self.early_exit_score = int(os.getenv('AGENT_EARLY_EXIT_SCORE', '90'))
+        self.agreement_tolerance = int(os.getenv('AGENT_AGREEMENT_TOLERANCE', '10'))
+        self.hedge_after = float(os.getenv('AGENT_HEDGE_AFTER_SECONDS', '2.5'))
+        self.hedge_model = os.getenv('AGENT_HEDGE_MODEL') or self.agent_model
+        # 'multi_agent' = three specialists + assessor, 'ensemble' = one structured-output call,
+        # 'batched' = ensemble calls shared by windows from many sessions
+        self.analysis_mode = os.getenv('ANALYSIS_MODE', 'multi_agent')
+        self.analysis_batcher = AnalysisBatcher(
+            self._analyze_batch_with_ensemble,
+            interval=float(os.getenv('BATCH_INTERVAL_MS', '100')) / 1000,
+            max_batch=int(os.getenv('BATCH_MAX_SIZE', '16'))
+        )
+
+        # Verdict cache for repeated windows (VERDICT_CACHE_SIZE=0 disables it)
+        cache_size = int(os.getenv('VERDICT_CACHE_SIZE', '2048'))
+        self.verdict_cache = VerdictCache(
+            max_entries=cache_size,
+            ttl=float(os.getenv('VERDICT_CACHE_TTL_SECONDS', '300')),
+            negative_ttl=float(os.getenv('VERDICT_CACHE_NEGATIVE_TTL_SECONDS', '1800'))
+        ) if cache_size > 0 else None
+
+        # Local codeword matcher: catches the codeword without any LLM round trip
+        self.extra_codewords = [c.strip() for c in os.getenv('EXTRA_CODEWORDS', '').split(',') if c.strip()]
+        self.codeword_fuzzy = os.getenv('CODEWORD_FUZZY', 'false').lower() == 'true'
+        # phrase tuple -> compiled CodewordIndex, shared by sessions using the same phrases; an LRU
+        # because per-session codewords come from clients
+        self.codeword_indexes = OrderedDict()
+        self.codeword_index_limit = int(os.getenv('CODEWORD_INDEX_CACHE_SIZE', '64'))
+
+        # Tier-1 local pre-scorer gating LLM escalation (CASCADE_ENABLED=false sends every window to Gemini)
+        self.prescorer = LexiconPrescorer(
+            codewords=[self.panic_codeword] + self.extra_codewords
+        ) if os.getenv('CASCADE_ENABLED', 'true').lower() == 'true' else None
+        self.escalation_threshold = int(os.getenv('CASCADE_ESCALATION_THRESHOLD', '10'))
+        self.calibration_sample_rate = float(os.getenv('CASCADE_SAMPLE_RATE', '0.05'))
+
+        # Per-session rolling summary sent with each window (SESSION_CONTEXT_NOTES=0 disables it);
+        # windows scoring at least the note score are remembered and keep the session on the LLM tier
+        self.context_notes = int(os.getenv('SESSION_CONTEXT_NOTES', '6'))
+        self.context_note_score = int(os.getenv('SESSION_CONTEXT_NOTE_SCORE', '40'))
+
+        # Detections from every source fold into one incident per session: one alert, then updates
+        self.incident_policy = IncidentPolicy.from_env()
+
+        # Optional Unix socket for the co-located Node backend (commands/media in, events out);
+        # the HTTP routes and callback keep working alongside it. Single-process mode only:
+        # sharded workers can't share one socket path, so they stay on HTTP behind the router
+        ipc_path = os.getenv('IPC_SOCKET_PATH')
+        self.ipc = IpcServer(self, ipc_path) if ipc_path and not os.getenv('WORKER_PORT') else None
+
+        self._register_metrics()
 
         logger.info(f"Initialized with codeword: {self.panic_codeword}")
         logger.info(f"Backend URL: {self.backend_url}")
 
+    def _register_metrics(self):
+        m = self.metrics
+        m.describe('agent_call_seconds', 'Latency of one Gemini analysis call, by agent')
+        m.describe('window_latency_seconds', 'First buffered transcript of a window to analysis_complete, by deciding tier')
+        m.describe('notify_latency_seconds', 'Backend notification enqueue to successful delivery')
+        m.describe('event_loop_lag_seconds', 'How late the event loop woke a 500 ms probe sleep')
+        m.describe('agent_errors_total', 'Gemini analysis calls that raised, by agent and kind')
+        m.describe('agent_parse_failures_total', 'Agent replies with no usable score (fell back to a default)')
+        m.describe('decoder_restarts_total', 'Audio decoder processes replaced after exiting mid-session')
+        m.describe('agent_streams_cut_total', 'Streamed agent replies closed as soon as their score was complete')
+        m.describe('analysis_fallbacks_total', 'Ensemble/batched analyses that fell back to multi-agent')
+        m.describe('alerts_total', 'Danger alerts raised (one per incident), by source')
+        m.describe('detections_total', 'Danger detections by source and what they did to the session incident')
+        m.describe('governor_wait_seconds', 'Time a Gemini request waited for a governor slot, by priority')
+        m.describe('windows_shed_total', 'Window analyses shed by the governor and merged into the next window')
+        m.describe('agent_early_exits_total', 'Multi-agent windows decided by one specialist crossing the early-exit score')
+        m.describe('assessor_skipped_total', 'Multi-agent windows whose specialists agreed, so no assessor call was made')
+        m.describe('agent_hedges_total', 'Slow agent calls that were hedged with a duplicate request, by agent')
+        m.describe('agent_hedge_wins_total', 'Hedged agent calls answered first by the duplicate, by agent')
+        m.gauge('active_sessions', lambda: len(self.sessions))
+        m.gauge('active_incidents', lambda: sum(
+            1 for session in self.sessions.values() if self.incident_policy.is_active(session.incident)
+        ))
+        m.gauge('live_sessions', self.sessions.live_count)
+        m.gauge('session_buffer_bytes', lambda: {
+            kind: sum(session.buffered_bytes()[i] for session in self.sessions.values())
+            for i, kind in enumerate(('transcript', 'audio'))
+        }, label='buffer')
+        m.gauge('scheduler_pending_windows', self.scheduler.pending)
+        m.gauge('scheduler_ready_queue', self.scheduler.ready.qsize)
+        m.gauge('notifier_pending_events', lambda: len(self.notifier.pending))
+        m.gauge('live_pool_warm_connections', lambda: len(self.live_pool.idle))
+        m.gauge('governor_in_flight', lambda: self.governor.in_flight)
+        m.gauge('governor_waiting', lambda: self.governor.snapshot()['waiting'], label='priority')
+        m.gauge('event_loop_lag_max_seconds', lambda: self.loop_probe.max_lag)
+
     async def notify_backend(self, session_id, data):
-        """Notify Node.js backend about codeword detection"""
-        import aiohttp
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f'{self.backend_url}/api/live/codeword-detected',
-                    json=data
-                ) as response:
-                    if response.status == 200:
-                        logger.info(f"✅ Successfully notified backend about codeword detection")
-                    else:
-                        logger.error(f"❌ Backend returned status {response.status}")
-        except Exception as e:
-            logger.error(f"❌ Error notifying backend: {e}")
+        """
+        Queue an event for the Node.js backend (delivered by the pooled notifier)
+        Sessions with a connected stream socket also get it pushed there, and skip the
+        HTTP callback entirely if the client asked for socket-only events. When the
+        backend is subscribed on the IPC socket, status events go there instead of HTTP
+        """
+        if 'type' not in data:
+            self.metrics.inc('alerts_total', source=data.get('source', 'unknown'))
+        session = self.sessions.get(session_id)
+        if session is not None and session.stream is not None:
+            session.stream.push(data)
+            if session.stream.replaces_http:
+                return
+        if self.ipc is not None:
+            if 'type' in data:
+                if self.ipc.emit(data):
+                    return
+            elif 'incident_id' in data:
+                # Alerts go out on the socket for speed and through the notifier too, whose
+                # retries survive a backend restart; the backend places one call per incident_id
+                self.ipc.emit(data)
+        self.notifier.enqueue(data)
+
+    async def report_detection(self, session_id, alert, detection_id=None):
+        """
+        Route a danger detection through the session's incident
+        The first one opens the incident and goes out as the alert; later ones within the
+        cooldown become 'incident_update' events, or nothing if they add no information.
+        detection_id makes a repeated delivery of the same detection (e.g. a Live function
+        call id) a no-op
+        """
+        session = self.sessions.get(session_id)
+        if session is None:
+            logger.warning(f"Detection for unknown session {session_id} ({alert['source']}); alerting anyway")
+            await self.notify_backend(session_id, alert)
+            return
+
+        action, session.incident = self.incident_policy.detect(
+            session.incident, alert['source'], alert['confidence'], detection_id
+        )
+        incident = session.incident
+        self.metrics.inc('detections_total', source=alert['source'], action=action)
+        if action == OPENED:
+            logger.warning(f"🚨 Incident {incident.incident_id} opened for session {session_id} by {alert['source']}")
+            await self.notify_backend(session_id, {**alert, **incident.describe()})
+        elif action == UPDATED:
+            logger.info(f"🔁 Incident {incident.incident_id} update #{incident.sequence}: {alert['source']} (confidence {alert['confidence']})")
+            await self.notify_backend(session_id, {
+                'type': 'incident_update',
+                'session_id': session_id,
+                **incident.describe(),
+                'sequence': incident.sequence,
+                'source': alert['source'],
+                'detected_phrase': alert['detected_phrase'],
+                'confidence': alert['confidence'],
+                'agentScores': alert.get('agentScores')
+            })
+        else:
+            logger.info(f"🔇 {alert['source']} detection merged into incident {incident.incident_id} ({action})")
+
+    def attach_stream(self, session_id, ws, replaces_http=False):
+        """Register a WebSocket as the event channel for a session"""
+        stream = SessionStream(ws, replaces_http=replaces_http)
+        self.sessions.get(session_id).stream = stream
+        logger.info(f"🔌 Stream socket attached to session {session_id} (socket-only events: {replaces_http})")
+        return stream
+
+    async def detach_stream(self, session_id, stream):
+        session = self.sessions.get(session_id)
+        if session is not None and session.stream is stream:
+            session.stream = None
+        undelivered = await stream.close()
+        if stream.replaces_http:
+            # Socket went away with alerts still queued: fall back to the HTTP callback
+            for event in undelivered:
+                event.pop('type', None)
+                self.notifier.enqueue(event)
+        logger.info(f"🔌 Stream socket detached from session {session_id}")
+
+    def get_codeword_index(self, session_codewords=None):
+        """Compiled matcher for the panic codeword plus any extra/per-session phrases"""
+        phrases = tuple([self.panic_codeword] + self.extra_codewords + validate_codewords(session_codewords))
+        index = self.codeword_indexes.get(phrases)
+        if index is None:
+            index = CodewordIndex(phrases, fuzzy=self.codeword_fuzzy)
+            self.codeword_indexes[phrases] = index
+            while len(self.codeword_indexes) > self.codeword_index_limit:
+                self.codeword_indexes.popitem(last=False)  # sessions keep their own reference
+        else:
+            self.codeword_indexes.move_to_end(phrases)
+        return index
+
+    async def _check_codewords(self, session_id, text, in_window=False):
+        """
+        Run a transcript chunk through the session's local matcher
+        An exact match alerts; a phonetic near miss ("help me mum") only forces an immediate
+        critical-priority window analysis, whose score decides. in_window says the caller
+        has already buffered text in the session's window
+        """
+        session = self.sessions.get(session_id)
+        if session is None or session.codeword_stream is None:
+            return False
+        matches = session.codeword_stream.feed(text)
+        for match in matches:
+            if match['match_type'] != 'exact':
+                logger.warning(f"🔎 Codeword near miss in session {session_id}: '{match['heard']}'; analyzing now")
+                if session.window is None:
+                    session.window = TranscriptWindow(self.window_policy)
+                if not in_window:
+                    session.window.add(text)
+                    in_window = True
+                session.window.mark_urgent()
+                self.scheduler.schedule(session_id, session.window.next_due_at())
+                continue
+            logger.warning(f"🚨 LOCAL CODEWORD MATCH in session {session_id}: '{match['heard']}' ({match['match_type']})")
+            await self.report_detection(session_id, {
+                'session_id': session_id,
+                'detected_phrase': match['phrase'],
+                'confidence': match['confidence'],
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'source': 'local_matcher'
+            })
+        return bool(matches)
 
     def get_system_instruction(self):
         return f"""You are a safety monitoring assistant. Your ONLY job is to detect when someone says EXACTLY the phrase: "{self.panic_codeword}"
@@ -94,10 +417,74 @@ Only trigger if you are 100% certain the user said this exact phrase."""
             }]
         }]
 
-    async def start_session(self, session_id):
-        """Start a Gemini Live session for audio/video monitoring"""
-        logger.info(f"Starting Gemini Live session {session_id}")
+    async def start_session(self, session_id, codewords=None):
+        """
+        Start a monitoring session (text-only until audio/video arrives)
+        Raises ValueError if codewords is not a valid list of phrases
+        """
+        logger.info(f"Starting session {session_id}")
+        state = Session(session_id)
+        state.codeword_stream = CodewordStream(self.get_codeword_index(codewords))
 
+        # No Gemini Live connection yet: text-only sessions never need one, and
+        # media sessions get one from the pool on their first chunk
+        self.sessions.add(state)
+        return True
+
+    def _request_live(self, session):
+        """Start connecting the session to Gemini Live unless it is connected, connecting, or backing off"""
+        if session.live_session is not None or session.live_task is not None:
+            return session.live_task
+        if time.monotonic() < session.live_retry_at:
+            return None
+        session.live_task = asyncio.create_task(self._open_live(session))
+        return session.live_task
+
+    async def _open_live(self, session):
+        """Attach a (pooled) Live connection to the session; returns it, or None on failure"""
+        session_id = session.session_id
+        try:
+            # Take a pre-connected Live session from the pool (connects inline if it is empty)
+            live_session, context_manager = await self.live_pool.acquire()
+        except Exception as e:
+            logger.error(f"Error connecting session {session_id} to Gemini Live: {e}")
+            session.live_retry_at = time.monotonic() + self.live_retry_seconds
+            return None
+        finally:
+            session.live_task = None
+
+        if self.sessions.get(session_id) is not session:
+            # Session was stopped while we were connecting
+            await self._close_context(context_manager)
+            return None
+
+        session.live_session = live_session
+        session.context_manager = context_manager
+        session.listen_task = asyncio.create_task(self._listen_for_responses(session_id, live_session))
+        logger.info(f"✅ Session {session_id} connected to Gemini Live API")
+        return live_session
+
+    async def _close_live(self, session):
+        """Close the session's Live connection, keeping the session itself (and its decoder) alive"""
+        context_manager = session.context_manager
+        session.live_session = None
+        session.context_manager = None
+        if session.live_task is not None:
+            session.live_task.cancel()
+            session.live_task = None
+        if session.listen_task is not None:
+            session.listen_task.cancel()
+            session.listen_task = None
+        await self._close_context(context_manager)
+
+    def _close_idle_live(self, now):
+        """Scheduler sweep: drop Live connections for sessions whose media has gone quiet"""
+        for session in self.sessions.media_idle_since(now - self.live_idle_seconds):
+            logger.info(f"💤 Closing Live connection for {session.session_id} (no media for {self.live_idle_seconds}s)")
+            asyncio.create_task(self._close_live(session))
+
+    async def _connect_live(self):
+        """Open a Gemini Live connection; returns (session, context_manager)"""
         config = types.LiveConnectConfig(
             response_modalities=["AUDIO"],  # Gemini Live requires audio response
             system_instruction=self.get_system_instruction(),
@@ -105,26 +492,11 @@ Only trigger if you are 100% certain the user said this exact phrase."""
             input_audio_transcription={},  # Enable input transcription for debugging
         )
 
-        try:
-            # Create the live session connection (keep reference to context manager)
+        # Create the live session connection (keep reference to context manager)
+        async with self.governor.slot(self.model, PRIORITY_HIGH):
             context_manager = self.client.aio.live.connect(model=self.model, config=config)
             session = await context_manager.__aenter__()
-
-            self.active_sessions[session_id] = {
-                'session': session,
-                'context_manager': context_manager,
-                'task': None
-            }
-            logger.info(f"✅ Session {session_id} connected to Gemini Live API")
-
-            # Start background task to listen for responses
-            task = asyncio.create_task(self._listen_for_responses(session_id, session))
-            self.active_sessions[session_id]['task'] = task
-
-            return True
-        except Exception as e:
-            logger.error(f"Error starting session {session_id}: {e}")
-            return False
+        return session, context_manager
 
     async def _listen_for_responses(self, session_id, session):
         """Background task to listen for Gemini responses"""
@@ -134,6 +506,11 @@ Only trigger if you are 100% certain the user said this exact phrase."""
                 if response.server_content and response.server_content.input_transcription:
                     transcript = response.server_content.input_transcription.text
                     logger.info(f"🎙️  TRANSCRIPT [{session_id}]: {transcript}")
+                    session_state = self.sessions.get(session_id)
+                    if session_state is not None:
+                        session_state.touch()
+                    if transcript:
+                        await self._check_codewords(session_id, transcript)
 
                 # Check for function calls (codeword detected!)
                 if response.tool_call:
@@ -142,13 +519,14 @@ Only trigger if you are 100% certain the user said this exact phrase."""
                             logger.warning(f"🚨 CODEWORD DETECTED in session {session_id}!")
                             logger.info(f"Function call args: {fc.args}")
 
-                            # Notify Node.js backend immediately via HTTP
-                            await self.notify_backend(session_id, {
+                            # Notify Node.js backend immediately (or update the incident already open)
+                            await self.report_detection(session_id, {
                                 'session_id': session_id,
                                 'detected_phrase': fc.args.get('detected_phrase', self.panic_codeword),
                                 'confidence': fc.args.get('confidence', 1.0),
-                                'timestamp': fc.args.get('timestamp', '')
-                            })
+                                'timestamp': fc.args.get('timestamp', ''),
+                                'source': 'live_tool_call'
+                            }, detection_id=fc.id)
 
                             # Send function response back to Gemini
                             await session.send_tool_response(
@@ -167,143 +545,580 @@ Only trigger if you are 100% certain the user said this exact phrase."""
             logger.error(f"Error listening to session {session_id}: {e}")
         finally:
             logger.info(f"Stopped listening to session {session_id}")
+            # If the server ended the connection, forget it so the next media chunk reconnects
+            state = self.sessions.get(session_id)
+            if state is not None and state.live_session is session:
+                state.live_session = None
+                state.listen_task = None
+                asyncio.create_task(self._close_context(state.context_manager))
+                state.context_manager = None
+
+    async def _close_context(self, context_manager):
+        if context_manager is None:
+            return
+        try:
+            await context_manager.__aexit__(None, None, None)
+        except Exception as e:
+            logger.error(f"Error closing Live connection: {e}")
 
     async def send_audio(self, session_id, audio_data):
         """Send audio data to active Gemini session"""
-        if session_id not in self.active_sessions:
+        session = self.sessions.get(session_id)
+        if session is None:
             logger.error(f"Session {session_id} not found")
             return False
+        session.touch()
+        session.last_media = session.last_activity
+
+        # Open the Live connection now so the handshake overlaps decoder startup
+        self._request_live(session)
+
+        # WebM/Opus chunks are one continuous container stream, so each session gets
+        # a single long-running decoder that emits 16 kHz PCM frames to the Live session
+        decoder = session.decoder
+        preamble = b''
+        if (decoder is not None and decoder.ready.is_set() and not decoder.running
+                and session.decoder_restarts < self.decoder_max_restarts):
+            # ffmpeg exited mid-session: replace it, primed with the container header
+            session.decoder_restarts += 1
+            logger.warning(f"🎧 Audio decoder for session {session_id} exited; restarting ({session.decoder_restarts}/{self.decoder_max_restarts})")
+            self.metrics.inc('decoder_restarts_total')
+            preamble = decoder.header or b''
+            asyncio.create_task(decoder.close())
+            decoder = session.decoder = None
+        if decoder is None:
+            decoder = AudioDecoder(
+                on_frame=lambda pcm: self._send_pcm_frame(session_id, pcm),
+                frame_ms=int(os.getenv('AUDIO_FRAME_MS', '100')),
+                buffer_ms=int(os.getenv('AUDIO_BUFFER_MS', '3000')),
+                preamble=preamble
+            )
+            # Registered before start() so concurrent chunks wait on this decoder instead of spawning another
+            session.decoder = decoder
+            if not await decoder.start():
+                session.decoder = None
+                return False
+            logger.info(f"🎧 Audio decoder started for session {session_id}")
+
+        logger.debug(f"Received audio chunk for session {session_id} ({len(audio_data)} bytes)")
+        return await decoder.feed(audio_data)
+
+    async def _send_pcm_frame(self, session_id, pcm):
+        """Forward one decoded PCM frame to the session's Gemini Live connection (speech only)"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return
+
+        segment_ended = False
+        if self.vad_enabled:
+            if session.vad_gate is None:
+                session.vad_gate = VoiceActivityGate()
+            pcm, segment_ended = session.vad_gate.process(pcm)
+
+        if not pcm and not segment_ended:
+            return
+
+        live_session = session.live_session
+        if live_session is None:
+            # Still connecting: waiting here holds later frames in the decoder's ring buffer,
+            # so speech from the first moments of the session is sent once the socket is up
+            task = self._request_live(session)
+            live_session = await task if task is not None else None
+            if live_session is None:
+                return
 
-        # For hackathon MVP: Audio streaming is complex with WebM chunks
-        # Accepting audio but not processing it yet
-        # The text-based trigger (send_text) will be used for demo
-        logger.debug(f"Received audio chunk for session {session_id}")
-        return True
+        try:
+            await self._send_live_audio(live_session, pcm, segment_ended)
+        except Exception as e:
+            # Usually a pooled connection the server closed while it sat idle (and the other
+            # warm ones with it): drop them and send this frame on a fresh connection
+            logger.warning(f"⚠️  Live send failed for session {session_id}, reconnecting: {e}")
+            self.live_pool.discard_idle()
+            if session.live_session is live_session:
+                await self._close_live(session)
+            task = self._request_live(session)
+            live_session = await task if task is not None else None
+            if live_session is not None:
+                await self._send_live_audio(live_session, pcm, segment_ended)
+
+    async def _send_live_audio(self, live_session, pcm, segment_ended):
+        if pcm:
+            await live_session.send_realtime_input(
+                audio=types.Blob(data=pcm, mime_type=PCM_MIME_TYPE)
+            )
+        if segment_ended:
+            # Tell Gemini the stream paused so it flushes buffered audio instead of waiting
+            await live_session.send_realtime_input(audio_stream_end=True)
+
+    def audio_stats(self):
+        """Decoder and VAD counters summed over active sessions"""
+        totals = {}
+        for session in self.sessions.values():
+            for part in (session.decoder, session.vad_gate):
+                if part is None:
+                    continue
+                for key, value in part.stats.items():
+                    totals[key] = totals.get(key, 0) + value
+        return totals
 
     async def send_text(self, session_id, text):
-        """Buffer speech transcripts and analyze every 10 seconds with Gemini"""
-        if session_id not in self.active_sessions:
+        """Buffer speech transcripts; the window task decides when to analyze them with Gemini"""
+        session = self.sessions.get(session_id)
+        if session is None:
             logger.error(f"Session {session_id} not found")
             return False
+        session.touch()
 
         logger.info(f"📝 Heard: '{text}'")
 
-        # Add to transcript buffer
-        if session_id not in self.transcript_buffers:
-            self.transcript_buffers[session_id] = []
-            # Start background task to process buffer every 10 seconds
-            task = asyncio.create_task(self._process_buffer_periodically(session_id))
-            self.buffer_tasks[session_id] = task
+        # Add to transcript window; the shared scheduler flushes it when a trigger fires
+        if session.window is None:
+            session.window = TranscriptWindow(self.window_policy)
+        session.window.add(text)
 
-        self.transcript_buffers[session_id].append(text)
+        # Local codeword check fires immediately; the LLM window analysis still runs
+        await self._check_codewords(session_id, text, in_window=True)
+        self.scheduler.schedule(session_id, session.window.next_due_at())
         return True
 
-    async def _process_buffer_periodically(self, session_id):
-        """Process transcript buffer every 10 seconds with Gemini analysis"""
-        while session_id in self.active_sessions:
-            await asyncio.sleep(10)  # Wait 10 seconds
-
-            if session_id not in self.transcript_buffers or len(self.transcript_buffers[session_id]) == 0:
-                continue
-
-            # Get all transcripts from the last 10 seconds
-            transcripts = self.transcript_buffers[session_id]
-            conversation = " ".join(transcripts)
-
-            logger.info(f"🤖 Analyzing 10-second buffer ({len(transcripts)} phrases): '{conversation}'")
-
-            # Clear buffer
-            self.transcript_buffers[session_id] = []
+    def _window_priority(self, session_id):
+        """Governor priority a session's due window will be analyzed at"""
+        session = self.sessions.get(session_id)
+        window = session.window if session is not None else None
+        if window is None:
+            return PRIORITY_ROUTINE
+        if window.urgent:
+            return PRIORITY_CRITICAL
+        return PRIORITY_HIGH if window.risky else PRIORITY_ROUTINE
+
+    async def _process_window(self, session_id):
+        """
+        Scheduler callback for a session whose window came due
+        Flushes the window on size, silence gap, max age or a lexical risk signal,
+        or reschedules it if the trigger is not met yet
+        """
+        session = self.sessions.get(session_id)
+        if session is None or session.window is None:
+            return
+        window = session.window
+
+        reason = window.due()
+        if reason is None:
+            due_at = window.next_due_at()
+            if due_at is not None:
+                self.scheduler.schedule(session_id, due_at)
+            return
+
+        first_heard_at = window.first_at
+        conversation, phrase_count = window.take()
+        # Codeword near misses go first, then windows flushed on a risk term, then routine ones
+        priority = {'codeword': PRIORITY_CRITICAL, 'risk': PRIORITY_HIGH}.get(reason, PRIORITY_ROUTINE)
+
+        logger.info(f"🤖 Analyzing window [{reason}] ({phrase_count} phrases): '{conversation}'")
+
+        # Only the new words go out, alongside a bounded summary of the session so far
+        if session.context is None and self.context_notes > 0:
+            session.context = SessionContext(self.context_notes, self.context_note_score)
+
+        # Notify frontend that analysis is starting
+        await self.notify_backend(session_id, {
+            'type': 'analysis_started',
+            'session_id': session_id
+        })
 
-            # Notify frontend that analysis is starting
+        async def send_full_breakdown(danger_score, agent_scores):
+            # Specialists still running at an early exit have finished; refresh the scores shown
             await self.notify_backend(session_id, {
-                'type': 'analysis_started',
-                'session_id': session_id
+                'type': 'analysis_complete',
+                'session_id': session_id,
+                'danger_score': danger_score,
+                'agent_scores': agent_scores
             })
 
-            # Analyze with Gemini multi-agent system
-            try:
-                danger_score, agent_scores = await self._analyze_conversation_safety(conversation)
-                logger.info(f"📊 Final danger score: {danger_score}/100")
+        # Analyze with Gemini multi-agent system
+        try:
+            danger_score, agent_scores = await self._analyze_conversation_safety(
+                conversation, priority, session.context, on_update=send_full_breakdown
+            )
+            logger.info(f"📊 Final danger score: {danger_score}/100")
+            if session.context is not None:
+                session.context.record(
+                    conversation,
+                    danger_score,
+                    self.window_policy.risk_terms_in(conversation),
+                    agent_scores.get('rationale')
+                )
+
+            # Always send agent scores back to frontend (even if not dangerous)
+            await self.notify_backend(session_id, {
+                'type': 'analysis_complete',
+                'session_id': session_id,
+                'danger_score': danger_score,
+                'agent_scores': agent_scores
+            })
+            self.metrics.observe(
+                'window_latency_seconds',
+                time.monotonic() - first_heard_at,
+                tier=agent_scores.get('tier', 'llm')
+            )
 
-                # Always send agent scores back to frontend (even if not dangerous)
-                await self.notify_backend(session_id, {
-                    'type': 'analysis_complete',
+            if danger_score >= 70:  # Threshold: 70%
+                logger.warning(f"🚨 DANGEROUS SITUATION DETECTED! Score: {danger_score}")
+                await self.report_detection(session_id, {
                     'session_id': session_id,
-                    'danger_score': danger_score,
-                    'agent_scores': agent_scores
+                    'detected_phrase': conversation[:100],  # First 100 chars
+                    'confidence': danger_score / 100,
+                    'timestamp': '',
+                    'agentScores': agent_scores,  # Include multi-agent breakdown
+                    'source': 'window_analysis'
                 })
+        except ShedError as e:
+            # Gemini is saturated: fold this window into the next one rather than drop it
+            self.metrics.inc('windows_shed_total')
+            logger.warning(f"⏳ Window for {session_id} shed ({e}); merging it into the next window")
+            if self.sessions.get(session_id) is session:
+                window.requeue(conversation, first_heard_at)
+                self.scheduler.schedule(session_id, window.next_due_at())
+        except Exception as e:
+            logger.error(f"Error analyzing conversation: {e}")
+
+    async def _analyze_conversation_safety(self, conversation, priority=PRIORITY_ROUTINE, context=None,
+                                           on_update=None):
+        """
+        Tiered cascade: a local lexicon pre-score first, Gemini agents only when it
+        crosses the escalation threshold, the session recently scored high (context),
+        or the window is sampled for calibration
+        Returns (final_score, agent_breakdown); agent_breakdown['tier'] says which tier decided.
+        on_update(final_score, agent_breakdown) is awaited later if the verdict came from an
+        early exit and the remaining agents finish in the background
+        """
+        summary = context.summary() if context is not None else ''
+        if self.prescorer is None:
+            final_score, agent_breakdown = await self._analyze_with_llm(conversation, priority, summary, on_update)
+            agent_breakdown['tier'] = 'llm'
+            return final_score, agent_breakdown
+
+        prescore, matched = self.prescorer.score(conversation)
+        # A quiet window right after a tense one still goes to the agents, with the summary
+        recent = context is not None and context.recent_peak() >= self.context_note_score
+        # Critical windows (codeword near misses) always get the agents' verdict
+        escalate = prescore >= self.escalation_threshold or recent or priority == PRIORITY_CRITICAL
+        sampled = not escalate and random.random() < self.calibration_sample_rate
+
+        if not (escalate or sampled):
+            logger.info(f"🪶 Tier 1 local verdict: {prescore}/100 (below {self.escalation_threshold}, not escalating)")
+            return prescore, {
+                'transcript': prescore,
+                'emotional': prescore,
+                'context': prescore,
+                'final': prescore,
+                'tier': 'local',
+                'prescore': prescore
+            }
 
-                if danger_score >= 70:  # Threshold: 70%
-                    logger.warning(f"🚨 DANGEROUS SITUATION DETECTED! Score: {danger_score}")
-                    await self.notify_backend(session_id, {
-                        'session_id': session_id,
-                        'detected_phrase': conversation[:100],  # First 100 chars
-                        'confidence': danger_score / 100,
-                        'timestamp': '',
-                        'agentScores': agent_scores  # Include multi-agent breakdown
-                    })
+        if prescore >= self.critical_prescore:
+            # Codeword or near-certain danger: served ahead of everything else
+            priority = PRIORITY_CRITICAL
+        logger.info(f"⬆️  Escalating to Gemini agents (prescore {prescore}/100{', calibration sample' if sampled else ''}{', recent risk in session' if recent else ''}, matched: {matched})")
+        final_score, agent_breakdown = await self._analyze_with_llm(conversation, priority, summary, on_update)
+        agent_breakdown['tier'] = 'llm'
+        agent_breakdown['prescore'] = prescore
+        if sampled:
+            agent_breakdown['sampled'] = True
+        if 'errors' in agent_breakdown and prescore > final_score:
+            # Failed agents count as 0; never let an outage score a risky window below its local pre-score
+            final_score = agent_breakdown['final'] = prescore
+            agent_breakdown['degraded'] = True
+        return final_score, agent_breakdown
+
+    async def _analyze_with_llm(self, conversation, priority=PRIORITY_ROUTINE, context='', on_update=None):
+        """
+        Score a conversation window with the configured Gemini analysis mode
+        context is the session's rolling summary ('' for a new or calm session)
+        Returns (final_score, agent_breakdown) in every mode
+        """
+        cache_key = None
+        if self.verdict_cache is not None:
+            cache_key = self.verdict_cache.make_key(conversation, self.panic_codeword, self.analysis_mode, context)
+            cached = self.verdict_cache.get(cache_key)
+            if cached is not None:
+                final_score, agent_breakdown = cached
+                agent_breakdown['cached'] = True
+                logger.info(f"♻️  Verdict cache hit: {final_score}/100")
+                return final_score, agent_breakdown
+
+        final_score, agent_breakdown = None, None
+        if self.analysis_mode in ('ensemble', 'batched'):
+            try:
+                if self.analysis_mode == 'batched' and priority == PRIORITY_ROUTINE:
+                    final_score, agent_breakdown = await self.analysis_batcher.submit((conversation, context))
+                else:
+                    # Urgent windows don't wait for a batch to fill
+                    final_score, agent_breakdown = await self._analyze_with_ensemble(conversation, priority, context)
+            except ShedError:
+                raise
             except Exception as e:
-                logger.error(f"Error analyzing conversation: {e}")
+                self.metrics.inc('analysis_fallbacks_total', mode=self.analysis_mode)
+                logger.error(f"{self.analysis_mode.capitalize()} analysis failed, falling back to multi-agent: {e}")
+        if agent_breakdown is None:
+            final_score, agent_breakdown = await self._analyze_with_agents(conversation, priority, context, on_update)
 
-    async def _analyze_conversation_safety(self, conversation):
+        if cache_key is not None and 'errors' not in agent_breakdown and 'pending' not in agent_breakdown:
+            self.verdict_cache.put(cache_key, final_score, agent_breakdown)
+        return final_score, agent_breakdown
+
+    async def _analyze_with_agents(self, conversation, priority=PRIORITY_ROUTINE, context='', on_update=None):
         """
         Multi-agent collaborative analysis system
-        Multiple specialized Gemini agents work together to assess danger level
+        Multiple specialized Gemini agents work together to assess danger level.
+        A specialist at the early-exit score decides the window without waiting for the
+        others (they finish in the background and on_update gets the full breakdown), and
+        specialists that agree are averaged instead of asking the threat assessor
         """
         logger.info("🤝 Starting multi-agent collaborative analysis...")
 
         # Run all agents in parallel for efficiency
-        results = await asyncio.gather(
-            self._agent_transcript_analyzer(conversation),
-            self._agent_emotional_detector(conversation),
-            self._agent_context_interpreter(conversation),
-            return_exceptions=True
-        )
+        tasks = {
+            asyncio.ensure_future(self._agent_transcript_analyzer(conversation, priority, context)): 'transcript',
+            asyncio.ensure_future(self._agent_emotional_detector(conversation, priority, context)): 'emotional',
+            asyncio.ensure_future(self._agent_context_interpreter(conversation, priority, context)): 'context',
+        }
+        results = {}
+        pending = set(tasks)
+        early_agent = None
+        try:
+            while pending and early_agent is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    self._collect_agent_result(tasks[task], task, results)
+                early_agent = self._early_exit_agent(results)
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            raise
 
-        # Extract scores from each agent
-        transcript_score, emotional_score, context_score = results
-
-        # Handle any errors
-        if isinstance(transcript_score, Exception):
-            logger.error(f"Transcript analyzer error: {transcript_score}")
-            transcript_score = 0
-        if isinstance(emotional_score, Exception):
-            logger.error(f"Emotional detector error: {emotional_score}")
-            emotional_score = 0
-        if isinstance(context_score, Exception):
-            logger.error(f"Context interpreter error: {context_score}")
-            context_score = 0
-
-        logger.info(f"📊 Agent Scores - Transcript: {transcript_score}, Emotional: {emotional_score}, Context: {context_score}")
-
-        # Threat Assessor Agent: Synthesizes all agent inputs
-        final_score = await self._agent_threat_assessor(
-            conversation,
-            transcript_score,
-            emotional_score,
-            context_score
-        )
+        # Extract scores from each agent (failed ones count as 0)
+        agent_breakdown, errors = self._specialist_scores(results)
+        logger.info(f"📊 Agent Scores - Transcript: {agent_breakdown['transcript']}, Emotional: {agent_breakdown['emotional']}, Context: {agent_breakdown['context']}")
+
+        scores = [score for score in agent_breakdown.values() if score is not None]
+        if early_agent is not None:
+            final_score = results[early_agent]
+            agent_breakdown['early_exit'] = early_agent
+            self.metrics.inc('agent_early_exits_total', agent=early_agent)
+            logger.warning(f"⚡ {SPECIALIST_AGENTS[early_agent]} scored {final_score}/100; deciding without the other agents")
+        elif not errors and self.agreement_tolerance >= 0 and max(scores) - min(scores) <= self.agreement_tolerance:
+            # The specialists agree; the assessor would only restate them
+            final_score = round(sum(scores) / len(scores))
+            agent_breakdown['assessor_skipped'] = True
+            self.metrics.inc('assessor_skipped_total')
+        else:
+            # Threat Assessor Agent: Synthesizes all agent inputs
+            final_score = await self._agent_threat_assessor(
+                conversation,
+                agent_breakdown['transcript'],
+                agent_breakdown['emotional'],
+                agent_breakdown['context'],
+                priority,
+                context
+            )
 
         logger.info(f"🎯 Final Threat Assessment: {final_score}/100")
 
         # Return both final score and individual agent scores for frontend display
-        agent_breakdown = {
-            'transcript': transcript_score,
-            'emotional': emotional_score,
-            'context': context_score,
-            'final': final_score
-        }
+        agent_breakdown['final'] = final_score
+        if errors:
+            # Failed agents were scored 0; flag it so the verdict is not cached or trusted as benign
+            agent_breakdown['errors'] = errors
+        if pending:
+            # Specialists still running are shown as None until they finish
+            agent_breakdown['pending'] = sorted(tasks[task] for task in pending)
+            asyncio.create_task(self._finish_agents(tasks, pending, results, agent_breakdown, on_update))
         return final_score, agent_breakdown
 
-    async def _agent_transcript_analyzer(self, conversation):
+    def _collect_agent_result(self, name, task, results):
+        """Record a finished specialist's score or exception; a shed request sheds the whole window"""
+        error = task.exception()
+        if isinstance(error, ShedError):
+            raise error
+        if error is not None:
+            logger.error(f"{SPECIALIST_AGENTS[name]} error: {error}")
+        results[name] = task.result() if error is None else error
+
+    def _specialist_scores(self, results):
+        """Breakdown of specialist scores (0 for failed agents, None for unfinished ones) and the failed names"""
+        breakdown, errors = {}, []
+        for name in SPECIALIST_AGENTS:
+            result = results.get(name)
+            if isinstance(result, Exception):
+                result = 0
+                errors.append(name)
+            breakdown[name] = result
+        return breakdown, errors
+
+    def _early_exit_agent(self, results):
+        """Specialist whose score alone decides the window, if any"""
+        if self.early_exit_score <= 0:
+            return None
+        hits = [name for name, result in results.items()
+                if not isinstance(result, Exception) and result >= self.early_exit_score]
+        return max(hits, key=results.get) if hits else None
+
+    async def _finish_agents(self, tasks, pending, results, early_breakdown, on_update):
+        """After an early exit, wait for the remaining specialists and report the full breakdown"""
+        try:
+            await asyncio.wait(pending)
+            for task in pending:
+                try:
+                    self._collect_agent_result(tasks[task], task, results)
+                except ShedError as e:
+                    results[tasks[task]] = e
+            scores, errors = self._specialist_scores(results)
+            agent_breakdown = {**early_breakdown, **scores}
+            del agent_breakdown['pending']
+            if errors:
+                agent_breakdown['errors'] = errors
+            logger.info(f"📊 Agent Scores after early exit - Transcript: {scores['transcript']}, Emotional: {scores['emotional']}, Context: {scores['context']}")
+            if on_update is not None:
+                await on_update(agent_breakdown['final'], agent_breakdown)
+        except Exception as e:
+            logger.error(f"Error finishing agents after early exit: {e}")
+
+    def _context_block(self, context):
+        """Prompt preamble carrying the session's rolling summary ('' when there is none)"""
+        if not context:
+            return ''
+        return f"""Earlier in this session (rolling summary; the conversation below is only what was said since):
+{context}
+Judge whether the new conversation continues or escalates what came before, and score the situation now.
+
+"""
+
+    async def _generate_agent_response(self, prompt, config=None, agent='agent', priority=PRIORITY_ROUTINE,
+                                       score_only=False):
+        """
+        Run a single agent prompt without blocking the event loop
+        Uses the async Gemini client under the governor (in-flight cap, per-model rate limit,
+        priority order) with a per-call timeout; 429s pause the model and are retried, and
+        slow calls are hedged (see _hedged_generate). score_only streams the reply and stops
+        reading as soon as it has opened with a complete score
+        """
+        max_wait = self.routine_max_wait if priority == PRIORITY_ROUTINE else None
+        attempt = 0
+        while True:
+            async with self.governor.slot(self.agent_model, priority, max_wait):
+                started = time.perf_counter()
+                try:
+                    return await asyncio.wait_for(
+                        self._hedged_generate(prompt, config, agent, score_only),
+                        timeout=self.agent_timeout
+                    )
+                except asyncio.TimeoutError:
+                    self.metrics.inc('agent_errors_total', agent=agent, kind='timeout')
+                    raise TimeoutError(f"agent call timed out after {self.agent_timeout}s")
+                except Exception as e:
+                    if not is_rate_limited(e):
+                        self.metrics.inc('agent_errors_total', agent=agent, kind='error')
+                        raise
+                    self.metrics.inc('agent_errors_total', agent=agent, kind='rate_limited')
+                    self.governor.throttle(self.agent_model, self.rate_limit_pause * (2 ** attempt))
+                    if attempt >= self.rate_limit_retries:
+                        raise
+                finally:
+                    self.metrics.observe('agent_call_seconds', time.perf_counter() - started, agent=agent)
+            attempt += 1
+            logger.warning(f"🚦 {agent} agent rate limited, retrying ({attempt}/{self.rate_limit_retries}, {PRIORITY_NAMES[priority]})")
+
+    async def _hedged_generate(self, prompt, config, agent, score_only=False):
+        """
+        One agent request; if it is still running after hedge_after seconds and the governor
+        has a slot free right now, a duplicate goes to the hedge model and the first answer wins
+        """
+        primary = asyncio.ensure_future(self._generate_text(self.agent_model, prompt, config, agent, score_only))
+        pending = {primary}
+        try:
+            if self.hedge_after > 0:
+                done, _ = await asyncio.wait(pending, timeout=self.hedge_after)
+                if not done and self.governor.try_acquire(self.hedge_model):
+                    self.metrics.inc('agent_hedges_total', agent=agent)
+                    logger.info(f"🐇 {agent} agent slower than {self.hedge_after}s; hedging on {self.hedge_model}")
+                    pending.add(asyncio.ensure_future(self._hedge_request(prompt, config, agent, score_only)))
+
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.metrics.inc('agent_hedge_wins_total', agent=agent)
+                        return task.result()
+                    # Prefer the primary's error: its 429s are what the governor throttles
+                    if error is None or task is primary:
+                        error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _hedge_request(self, prompt, config, agent, score_only):
+        """The duplicate half of a hedged call; holds the governor slot try_acquire gave it"""
+        try:
+            return await self._generate_text(self.hedge_model, prompt, config, agent, score_only)
+        finally:
+            self.governor.release()
+
+    async def _generate_text(self, model, prompt, config, agent, score_only=False):
+        if not score_only:
+            response = await self.client.aio.models.generate_content(
+                model=model,
+                contents=prompt,
+                config=config
+            )
+            return (response.text or '').strip()
+
+        # Score agents: read the stream only until the reply has given its number
+        reply = ScoreStream()
+        stream = await self.client.aio.models.generate_content_stream(
+            model=model,
+            contents=prompt,
+            config=config
+        )
+        try:
+            async for chunk in stream:
+                if reply.feed(chunk.text or ''):
+                    self.metrics.inc('agent_streams_cut_total', agent=agent)
+                    break
+        finally:
+            aclose = getattr(stream, 'aclose', None)
+            if aclose is not None:
+                await aclose()
+        return reply.result()
+
+    async def _score_agent(self, prompt, agent, label, priority, default=0):
+        """
+        Run a score-only agent prompt and read its 0-100 score
+        Replies with no clear score count as a parse failure and score default
+        """
+        response_text = await self._generate_agent_response(prompt, agent=agent, priority=priority, score_only=True)
+        logger.debug(f"  {label} raw response: '{response_text}'")
+
+        score = parse_score(response_text)
+        if score is None:
+            self.metrics.inc('agent_parse_failures_total', agent=agent)
+            logger.warning(f"  {label}: No score found in '{response_text}', defaulting to {default}")
+            score = default
+
+        logger.info(f"  {label}: {score}/100")
+        return score
+
+    async def _agent_transcript_analyzer(self, conversation, priority=PRIORITY_ROUTINE, context=''):
         """
         Agent 1: Transcript Analyzer
         Analyzes literal content and keywords for concerning language
         """
         prompt = f"""You are a TRANSCRIPT ANALYSIS AGENT. Your job is to analyze the literal words spoken.
 
-Conversation: "{conversation}"
+{self._context_block(context)}Conversation: "{conversation}"
 
 Analyze ONLY the literal content:
 - Explicit threats or aggressive language
@@ -319,36 +1134,19 @@ Examples: "0" or "45" or "88"
 Your response:"""
 
         try:
-            response = self.client.models.generate_content(
-                model='gemini-2.5-flash',
-                contents=prompt
-            )
-            response_text = response.text.strip()
-            logger.debug(f"  📝 Transcript Agent raw response: '{response_text}'")
-
-            # Extract number from response (handle cases like "Score: 75" or just "75")
-            import re
-            numbers = re.findall(r'\d+', response_text)
-            if numbers:
-                score = int(numbers[0])
-            else:
-                logger.warning(f"  📝 Transcript Agent: No number found in '{response_text}', defaulting to 0")
-                score = 0
-
-            logger.info(f"  📝 Transcript Agent: {score}/100")
-            return min(100, max(0, score))
+            return await self._score_agent(prompt, 'transcript', '📝 Transcript Agent', priority)
         except Exception as e:
             logger.error(f"Transcript agent error: {e}")
             raise
 
-    async def _agent_emotional_detector(self, conversation):
+    async def _agent_emotional_detector(self, conversation, priority=PRIORITY_ROUTINE, context=''):
         """
         Agent 2: Emotional State Detector
         Detects emotional distress, fear, anxiety through language patterns
         """
         prompt = f"""You are an EMOTIONAL ANALYSIS AGENT. Your job is to detect emotional state through language.
 
-Conversation: "{conversation}"
+{self._context_block(context)}Conversation: "{conversation}"
 
 Analyze ONLY emotional indicators:
 - Signs of stress, fear, or anxiety
@@ -364,35 +1162,19 @@ Examples: "0" or "45" or "88"
 Your response:"""
 
         try:
-            response = self.client.models.generate_content(
-                model='gemini-2.5-flash',
-                contents=prompt
-            )
-            response_text = response.text.strip()
-            logger.debug(f"  😰 Emotional Agent raw response: '{response_text}'")
-
-            import re
-            numbers = re.findall(r'\d+', response_text)
-            if numbers:
-                score = int(numbers[0])
-            else:
-                logger.warning(f"  😰 Emotional Agent: No number found in '{response_text}', defaulting to 0")
-                score = 0
-
-            logger.info(f"  😰 Emotional Agent: {score}/100")
-            return min(100, max(0, score))
+            return await self._score_agent(prompt, 'emotional', '😰 Emotional Agent', priority)
         except Exception as e:
             logger.error(f"Emotional agent error: {e}")
             raise
 
-    async def _agent_context_interpreter(self, conversation):
+    async def _agent_context_interpreter(self, conversation, priority=PRIORITY_ROUTINE, context=''):
         """
         Agent 3: Context Interpreter
         Understands social dynamics, power imbalances, situational context
         """
         prompt = f"""You are a CONTEXT ANALYSIS AGENT. Your job is to understand social dynamics and situational context.
 
-Conversation: "{conversation}"
+{self._context_block(context)}Conversation: "{conversation}"
 
 Analyze ONLY contextual factors:
 - Power dynamics between speakers
@@ -408,35 +1190,20 @@ Examples: "0" or "45" or "88"
 Your response:"""
 
         try:
-            response = self.client.models.generate_content(
-                model='gemini-2.5-flash',
-                contents=prompt
-            )
-            response_text = response.text.strip()
-            logger.debug(f"  🔍 Context Agent raw response: '{response_text}'")
-
-            import re
-            numbers = re.findall(r'\d+', response_text)
-            if numbers:
-                score = int(numbers[0])
-            else:
-                logger.warning(f"  🔍 Context Agent: No number found in '{response_text}', defaulting to 0")
-                score = 0
-
-            logger.info(f"  🔍 Context Agent: {score}/100")
-            return min(100, max(0, score))
+            return await self._score_agent(prompt, 'context', '🔍 Context Agent', priority)
         except Exception as e:
             logger.error(f"Context agent error: {e}")
             raise
 
-    async def _agent_threat_assessor(self, conversation, transcript_score, emotional_score, context_score):
+    async def _agent_threat_assessor(self, conversation, transcript_score, emotional_score, context_score,
+                                     priority=PRIORITY_ROUTINE, context=''):
         """
         Agent 4: Threat Assessor
         Meta-agent that synthesizes inputs from other agents to make final decision
         """
         prompt = f"""You are the THREAT ASSESSMENT COORDINATOR. You synthesize analysis from specialist agents.
 
-Conversation: "{conversation}"
+{self._context_block(context)}Conversation: "{conversation}"
 
 Specialist Agent Reports:
 - Transcript Analysis Agent: {transcript_score}/100 (literal content)
@@ -456,28 +1223,112 @@ Examples: "0" or "45" or "88"
 
 Your response:"""
 
+        # Fallback for errors and unparseable replies: average of available agent scores
+        average = int((transcript_score + emotional_score + context_score) / 3)
         try:
-            response = self.client.models.generate_content(
-                model='gemini-2.5-flash',
-                contents=prompt
-            )
-            response_text = response.text.strip()
-            logger.debug(f"  ⚖️  Threat Assessor raw response: '{response_text}'")
-
-            import re
-            numbers = re.findall(r'\d+', response_text)
-            if numbers:
-                score = int(numbers[0])
-            else:
-                logger.warning(f"  ⚖️  Threat Assessor: No number found in '{response_text}', defaulting to average")
-                score = int((transcript_score + emotional_score + context_score) / 3)
-
-            logger.info(f"  ⚖️  Threat Assessor (Meta-Agent): {score}/100")
-            return min(100, max(0, score))
+            return await self._score_agent(prompt, 'assessor', '⚖️  Threat Assessor', priority, default=average)
+        except ShedError:
+            raise
         except Exception as e:
             logger.error(f"Threat assessor error: {e}")
-            # Fallback: average of available agent scores
-            return int((transcript_score + emotional_score + context_score) / 3)
+            return average
+
+    async def _analyze_with_ensemble(self, conversation, priority=PRIORITY_ROUTINE, context=''):
+        """
+        Ensemble mode: one request returns all four scores as structured JSON
+        Same agent_breakdown shape as the multi-agent path, at a quarter of the calls
+        """
+        logger.info("🧩 Starting single-call ensemble analysis...")
+
+        prompt = f"""You are a SAFETY ASSESSMENT PANEL made of four specialists. Score this conversation from four perspectives.
+
+{self._context_block(context)}Conversation: "{conversation}"
+
+- transcript: LITERAL CONTENT only (explicit threats, aggressive language, direct requests for help, mentions of danger or fear, attempts to leave)
+- emotional: EMOTIONAL STATE only (stress, fear, anxiety, nervousness, hesitation, coded or passive-aggressive language)
+- context: CONTEXTUAL FACTORS only (power dynamics, coercion, manipulation, social pressure, situational red flags)
+- final: THREAT ASSESSMENT COORDINATOR synthesis of the three perspectives above (agreement between them, anything one caught that others missed, the overall pattern)
+
+Every score is an integer danger rating from 0 to 100.
+Add a one-sentence rationale for the final score."""
+
+        config = types.GenerateContentConfig(
+            response_mime_type='application/json',
+            response_schema=ENSEMBLE_RESPONSE_SCHEMA
+        )
+        response_text = await self._generate_agent_response(prompt, config=config, agent='ensemble', priority=priority)
+        logger.debug(f"  🧩 Ensemble raw response: '{response_text}'")
+
+        final_score, breakdown = self._parse_ensemble_scores(json.loads(response_text))
+
+        logger.info(f"📊 Ensemble Scores - Transcript: {breakdown['transcript']}, Emotional: {breakdown['emotional']}, Context: {breakdown['context']}")
+        logger.info(f"🎯 Final Threat Assessment: {final_score}/100")
+        return final_score, breakdown
+
+    def _parse_ensemble_scores(self, result):
+        """Turn one structured ensemble result into (final_score, agent_breakdown)"""
+        breakdown = {}
+        for key in ('transcript', 'emotional', 'context'):
+            breakdown[key] = min(100, max(0, int(result.get(key, 0))))
+        if result.get('final') is None:
+            logger.warning("  🧩 Ensemble: no final score, defaulting to average")
+            final_score = int((breakdown['transcript'] + breakdown['emotional'] + breakdown['context']) / 3)
+        else:
+            final_score = min(100, max(0, int(result['final'])))
+        breakdown['final'] = final_score
+        if result.get('rationale'):
+            breakdown['rationale'] = result['rationale']
+        return final_score, breakdown
+
+    async def _analyze_batch_with_ensemble(self, items):
+        """
+        Batched mode: score several sessions' windows in one structured-output request
+        items are (conversation, session summary) pairs; each is labeled with an id and
+        the response is routed back by id
+        """
+        if len(items) == 1:
+            conversation, context = items[0]
+            return [await self._analyze_with_ensemble(conversation, context=context)]
+
+        labeled = "\n".join(
+            f'[{i}] "{conversation}"' + (f"\n    Earlier in that session: {' / '.join(context.splitlines())}" if context else '')
+            for i, (conversation, context) in enumerate(items)
+        )
+        prompt = f"""You are a SAFETY ASSESSMENT PANEL made of four specialists. Below are {len(items)} UNRELATED conversations, each labeled with an id. Score each one independently.
+
+Conversations:
+{labeled}
+
+For EACH conversation give:
+- transcript: LITERAL CONTENT only (explicit threats, aggressive language, direct requests for help, mentions of danger or fear, attempts to leave)
+- emotional: EMOTIONAL STATE only (stress, fear, anxiety, nervousness, hesitation, coded or passive-aggressive language)
+- context: CONTEXTUAL FACTORS only (power dynamics, coercion, manipulation, social pressure, situational red flags)
+- final: THREAT ASSESSMENT COORDINATOR synthesis of the three perspectives above
+
+Some conversations come with a summary of earlier in that session; use it to judge whether the conversation continues or escalates what came before.
+Every score is an integer danger rating from 0 to 100. Return exactly one result per id."""
+
+        config = types.GenerateContentConfig(
+            response_mime_type='application/json',
+            response_schema=BATCH_RESPONSE_SCHEMA
+        )
+        response_text = await self._generate_agent_response(prompt, config=config, agent='batch')
+        logger.debug(f"  📦 Batch raw response: '{response_text}'")
+
+        by_id = {}
+        for item in json.loads(response_text):
+            try:
+                by_id[int(item['id'])] = self._parse_ensemble_scores(item)
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        results = []
+        for i in range(len(items)):
+            if i in by_id:
+                results.append(by_id[i])
+            else:
+                results.append(ValueError(f"batch response missing id {i}"))
+        return results
 
     async def send_video(self, session_id, video_data):
         """Send audio from WebM container to Gemini session"""
@@ -486,31 +1337,23 @@ Your response:"""
 
     async def stop_session(self, session_id):
         """Stop an active session"""
-        if session_id in self.active_sessions:
+        # Remove from the registry first so nothing new is routed to this session
+        session = self.sessions.pop(session_id)
+        if session is not None:
             logger.info(f"Stopping session {session_id}")
-            session_data = self.active_sessions[session_id]
 
-            # Cancel the listening task
-            if session_data['task']:
-                session_data['task'].cancel()
+            # Shut down the audio decoder process
+            if session.decoder is not None:
+                await session.decoder.close()
 
-            # Cancel the buffer processing task
-            if session_id in self.buffer_tasks:
-                self.buffer_tasks[session_id].cancel()
-                del self.buffer_tasks[session_id]
+            # Drop any pending window deadline
+            self.scheduler.cancel(session_id)
 
-            # Clear transcript buffer
-            if session_id in self.transcript_buffers:
-                del self.transcript_buffers[session_id]
+            # Cancel the listener / in-progress connect and close the Live connection, if any
+            await self._close_live(session)
 
-            # Close the session using the context manager
-            try:
-                await session_data['context_manager'].__aexit__(None, None, None)
-            except Exception as e:
-                logger.error(f"Error closing session {session_id}: {e}")
-
-            # Remove from active sessions
-            del self.active_sessions[session_id]
+            if self.ipc is not None:
+                self.ipc.forget(session_id)
 
 
 # HTTP server for communication with Node.js
@@ -524,8 +1367,11 @@ async def handle_start_session(request):
     if not session_id:
         return web.json_response({'error': 'session_id required'}, status=400)
 
-    # Actually start the Gemini Live session
-    success = await handler_instance.start_session(session_id)
+    # Actually start the Gemini Live session (optional extra per-session codewords)
+    try:
+        success = await handler_instance.start_session(session_id, data.get('codewords'))
+    except ValueError as e:
+        return web.json_response({'error': str(e)}, status=400)
 
     if success:
         return web.json_response({
@@ -576,10 +1422,25 @@ async def handle_health(request):
     """Health check endpoint"""
     return web.json_response({
         'status': 'healthy',
-        'active_sessions': len(handler_instance.active_sessions),
-        'codeword': handler_instance.panic_codeword
+        'active_sessions': len(handler_instance.sessions),
+        'codeword': handler_instance.panic_codeword,
+        'notifier': handler_instance.notifier.stats,
+        'verdict_cache': handler_instance.verdict_cache.snapshot() if handler_instance.verdict_cache else None,
+        'analysis_batcher': handler_instance.analysis_batcher.snapshot(),
+        'audio': handler_instance.audio_stats(),
+        'memory': handler_instance.sessions.memory_report(),
+        'scheduler': handler_instance.scheduler.snapshot(),
+        'live_pool': handler_instance.live_pool.snapshot(),
+        'governor': handler_instance.governor.snapshot(),
+        'ipc': handler_instance.ipc.snapshot() if handler_instance.ipc else None
     })
 
+async def handle_metrics(request):
+    """Latency histograms, error counters and queue gauges (Prometheus text, or ?format=json)"""
+    if request.query.get('format') == 'json':
+        return web.json_response(handler_instance.metrics.snapshot())
+    return web.Response(text=handler_instance.metrics.render_prometheus(), content_type='text/plain')
+
 async def handle_send_text(request):
     """HTTP endpoint to send text data"""
     session_id = request.match_info.get('session_id')
@@ -593,8 +1454,72 @@ async def handle_send_text(request):
         'session_id': session_id
     })
 
+async def handle_session_stream(request):
+    """
+    WebSocket endpoint for a started session
+    Binary frames are audio chunks, text frames are JSON ({"type": "text", "text": ...}
+    or {"type": "stop"}); analysis and detection events are pushed back on the same socket.
+    Messages are handled one at a time, so a slow handler applies TCP backpressure to the sender.
+    Connect with ?notify=ws to receive events only here instead of via the HTTP callback.
+    """
+    session_id = request.match_info.get('session_id')
+    ws = web.WebSocketResponse(heartbeat=20, max_msg_size=4 * 1024 * 1024)
+    await ws.prepare(request)
+
+    if session_id not in handler_instance.sessions:
+        await ws.send_json({'type': 'error', 'error': 'Session not found', 'session_id': session_id})
+        await ws.close()
+        return ws
+
+    stream = handler_instance.attach_stream(
+        session_id, ws, replaces_http=request.query.get('notify') == 'ws'
+    )
+    try:
+        async for msg in ws:
+            if msg.type == WSMsgType.BINARY:
+                await handler_instance.send_audio(session_id, msg.data)
+            elif msg.type == WSMsgType.TEXT:
+                try:
+                    data = json.loads(msg.data)
+                except ValueError:
+                    stream.push({'type': 'error', 'error': 'Invalid JSON', 'session_id': session_id})
+                    continue
+                if data.get('type') == 'text':
+                    await handler_instance.send_text(session_id, data.get('text', ''))
+                elif data.get('type') == 'stop':
+                    await handler_instance.stop_session(session_id)
+                    break
+                else:
+                    stream.push({'type': 'error', 'error': f"Unknown message type: {data.get('type')}", 'session_id': session_id})
+            elif msg.type == WSMsgType.ERROR:
+                logger.error(f"Stream socket error for {session_id}: {ws.exception()}")
+                break
+    finally:
+        await handler_instance.detach_stream(session_id, stream)
+
+    return ws
+
+async def on_startup(app):
+    handler_instance.notifier.start()
+    handler_instance.scheduler.start()
+    handler_instance.live_pool.start()
+    handler_instance.loop_probe.start()
+    if handler_instance.ipc is not None:
+        await handler_instance.ipc.start()
+    handler_instance.sessions.mark_baseline()
+
+async def on_cleanup(app):
+    if handler_instance.ipc is not None:
+        await handler_instance.ipc.close()
+    await handler_instance.loop_probe.close()
+    await handler_instance.scheduler.close()
+    await handler_instance.live_pool.close()
+    await handler_instance.notifier.close()
+
 def create_app():
     app = web.Application()
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
 
     # Add routes
     app.router.add_post('/session/start', handle_start_session)
@@ -602,7 +1527,9 @@ def create_app():
     app.router.add_post('/session/{session_id}/video', handle_send_video)
     app.router.add_post('/session/{session_id}/text', handle_send_text)
     app.router.add_post('/session/{session_id}/stop', handle_stop_session)
+    app.router.add_get('/session/{session_id}/stream', handle_session_stream)
     app.router.add_get('/health', handle_health)
+    app.router.add_get('/metrics', handle_metrics)
 
     # Setup CORS
     cors = cors_setup(app, defaults={
@@ -621,8 +1548,27 @@ def create_app():
     return app
 
 if __name__ == '__main__':
-    logger.info("🚀 Starting Gemini Live Stream Handler")
-    logger.info(f"📝 Monitoring for codeword: '{handler_instance.panic_codeword}'")
+    worker_port = os.getenv('WORKER_PORT')
+    workers = int(os.getenv('PYTHON_WORKERS', '1'))
+
+    if worker_port:
+        # Spawned by the shard router: serve this worker's share of sessions on a private port
+        logger.info(f"🚀 Starting Gemini Live Stream Handler worker {os.getenv('WORKER_INDEX', '?')} on port {worker_port}")
+        web.run_app(create_app(), host='127.0.0.1', port=int(worker_port), print=None)
+    elif workers > 1:
+        logger.info(f"🚀 Starting Gemini Live Stream Handler with {workers} workers")
+        if os.getenv('IPC_SOCKET_PATH'):
+            logger.warning("⚠️  IPC_SOCKET_PATH is ignored with PYTHON_WORKERS > 1; the backend will use HTTP")
+        logger.info(f"📝 Monitoring for codeword: '{handler_instance.panic_codeword}'")
+        router = ShardRouter(
+            [sys.executable, os.path.abspath(__file__)],
+            workers=workers,
+            base_port=int(os.getenv('WORKER_BASE_PORT', '5101'))
+        )
+        web.run_app(create_router_app(router), host='127.0.0.1', port=5001)
+    else:
+        logger.info("🚀 Starting Gemini Live Stream Handler")
+        logger.info(f"📝 Monitoring for codeword: '{handler_instance.panic_codeword}'")
 
-    app = create_app()
-    web.run_app(app, host='127.0.0.1', port=5001)
+        app = create_app()
+        web.run_app(app, host='127.0.0.1', port=5001)
@@ -0,0 +1,195 @@
+"""
+In-process metrics for /metrics
+Counters, histograms and callback gauges rendered as Prometheus text or JSON,
+plus an event-loop lag probe. No client library needed: the handler is one
+process (or one per worker), so plain dicts are enough.
+"""
+import asyncio
+import bisect
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = 'live_handler_'
+
+# Seconds; covers sub-ms loop lag up to Gemini calls hitting the agent timeout
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _label_text(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    body = ','.join(f'{name}="{str(value)}"' for name, value in pairs)
+    return '{' + body + '}'
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'count', 'sum')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation (None when empty)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+        }
+
+
+class MetricsRegistry:
+    """
+    inc()/observe() create series on first use; gauges are callables read at scrape time
+    (returning a number, or a dict of label-value -> number for a labelled gauge)
+    """
+
+    def __init__(self):
+        self.counters = {}  # name -> {label key: value}
+        self.histograms = {}  # name -> {label key: Histogram}
+        self.gauges = {}  # name -> (callable, label name or None)
+        self.help = {}
+
+    def describe(self, name, text):
+        self.help[name] = text
+
+    def inc(self, name, amount=1, **labels):
+        series = self.counters.setdefault(name, {})
+        key = _label_key(labels)
+        series[key] = series.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        series = self.histograms.setdefault(name, {})
+        key = _label_key(labels)
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+        histogram.observe(value)
+
+    def gauge(self, name, read, label=None):
+        self.gauges[name] = (read, label)
+
+    def _read_gauge(self, name, read, label):
+        try:
+            value = read()
+        except Exception as e:
+            logger.error(f"Error reading gauge {name}: {e}")
+            return {}
+        if label is None:
+            return {(): value}
+        return {((label, k),): v for k, v in value.items()}
+
+    def render_prometheus(self):
+        lines = []
+
+        def header(name, kind):
+            full = METRIC_PREFIX + name
+            if name in self.help:
+                lines.append(f'# HELP {full} {self.help[name]}')
+            lines.append(f'# TYPE {full} {kind}')
+            return full
+
+        for name, series in sorted(self.counters.items()):
+            full = header(name, 'counter')
+            for key, value in sorted(series.items()):
+                lines.append(f'{full}{_label_text(key)} {value}')
+
+        for name, (read, label) in sorted(self.gauges.items()):
+            full = header(name, 'gauge')
+            for key, value in sorted(self._read_gauge(name, read, label).items()):
+                if value is not None:
+                    lines.append(f'{full}{_label_text(key)} {value}')
+
+        for name, series in sorted(self.histograms.items()):
+            full = header(name, 'histogram')
+            for key, histogram in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{full}_bucket{_label_text(key, [("le", bound)])} {cumulative}')
+                lines.append(f'{full}_bucket{_label_text(key, [("le", "+Inf")])} {histogram.count}')
+                lines.append(f'{full}_sum{_label_text(key)} {histogram.sum}')
+                lines.append(f'{full}_count{_label_text(key)} {histogram.count}')
+
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        """JSON form: series keyed by their label text ('' when unlabelled)"""
+        return {
+            'counters': {
+                name: {_label_text(key): value for key, value in series.items()}
+                for name, series in self.counters.items()
+            },
+            'gauges': {
+                name: {_label_text(key): value for key, value in self._read_gauge(name, read, label).items()}
+                for name, (read, label) in self.gauges.items()
+            },
+            'histograms': {
+                name: {_label_text(key): histogram.snapshot() for key, histogram in series.items()}
+                for name, series in self.histograms.items()
+            },
+        }
+
+
+class LoopLagProbe:
+    """
+    Sleeps for interval and records how late it woke up; sustained lag means
+    something is blocking the event loop (CPU-bound parsing, sync I/O, ...)
+    """
+
+    def __init__(self, metrics, interval=0.5):
+        self.metrics = metrics
+        self.interval = interval
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self.task = None
+
+    def start(self):
+        """Start probing (idempotent, needs a running loop)"""
+        if self.task is None:
+            self.task = asyncio.create_task(self._probe())
+
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def _probe(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.metrics.observe('event_loop_lag_seconds', lag)
+            if lag > 0.25:
+                logger.warning(f"🐢 Event loop lagged {lag * 1000:.0f} ms")
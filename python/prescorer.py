@@ -0,0 +1,67 @@
+"""
+Tier-1 local danger pre-scorer
+Weighted lexicon over the buffered transcript that gives a provisional danger
+score in microseconds, used to decide whether a window is worth the Gemini agents
+"""
+from codeword_matcher import tokenize
+
+# phrase -> weight (0-100); multi-word phrases are matched on token boundaries
+DANGER_LEXICON = {
+    # Direct requests for help
+    'help': 25, 'help me': 45, 'somebody help': 55, 'call the police': 60,
+    'call 911': 60, 'police': 30, '911': 40,
+    # Refusal / attempts to leave
+    'stop': 15, 'please stop': 40, 'let me go': 55, 'leave me alone': 45,
+    "don't touch me": 60, 'get away from me': 55, 'get off me': 60, 'i want to leave': 35,
+    'i want to go home': 30, 'no means no': 45, 'please no': 35,
+    # Fear / distress
+    'scared': 30, 'afraid': 30, 'terrified': 40, 'hurt': 30, 'hurting me': 55,
+    'you are hurting me': 60, "you're hurting me": 60, 'bleeding': 40,
+    # Threats and weapons
+    'gun': 45, 'knife': 45, 'weapon': 40, 'kill': 50, 'kill you': 65,
+    'or else': 35, 'shut up': 25, 'nobody will know': 45, "don't tell anyone": 40,
+    # Coercion / being moved
+    'get in the car': 40, 'come with me': 25, 'you have to': 15, "you're not going anywhere": 55,
+    'lock the door': 25, 'give me your phone': 40,
+}
+
+
+class LexiconPrescorer:
+    """
+    Scores a conversation from 0-100 using weighted phrase hits
+    Hits are combined as independent evidence (1 - prod(1 - w)), so several weak
+    signals add up but the score never exceeds 100
+    """
+
+    def __init__(self, lexicon=None, codewords=()):
+        lexicon = dict(DANGER_LEXICON if lexicon is None else lexicon)
+        for codeword in codewords:
+            lexicon[codeword] = 100
+        self.phrases = {}  # first token -> list of (token tuple, weight, original phrase)
+        for phrase, weight in lexicon.items():
+            tokens = tuple(tokenize(phrase))
+            if tokens:
+                self.phrases.setdefault(tokens[0], []).append((tokens, weight, phrase))
+        for candidates in self.phrases.values():
+            # Longest phrase first, so "help me" wins over "help"
+            candidates.sort(key=lambda c: len(c[0]), reverse=True)
+
+    def score(self, conversation):
+        """Return (score, matched phrases)"""
+        tokens = tokenize(conversation)
+        matched = {}
+        i = 0
+        while i < len(tokens):
+            step = 1
+            for phrase_tokens, weight, phrase in self.phrases.get(tokens[i], ()):
+                if tuple(tokens[i:i + len(phrase_tokens)]) == phrase_tokens:
+                    matched[phrase] = weight
+                    # Tokens inside a matched phrase don't count again as shorter phrases
+                    step = len(phrase_tokens)
+                    break
+            i += step
+
+        remaining = 1.0
+        for weight in matched.values():
+            remaining *= 1 - weight / 100
+        return int(round(100 * (1 - remaining))), sorted(matched)
@@ -0,0 +1,257 @@
+"""
+Batch replay of recorded conversations through the safety analysis pipeline
+Streams a JSONL or CSV corpus through _analyze_conversation_safety (same cascade,
+agents and prompts as live sessions) with bounded concurrency and writes one CSV
+row of scores and timings per window:
+
+    python replay.py corpus.jsonl results.csv --concurrency 64 --rps 20
+
+Each record needs an id and the conversation text (columns/keys: id, conversation
+or text, optional label). Long conversations are split into windows the size of a
+live window. The output doubles as the checkpoint: rerunning with the same output
+skips windows already written. --cache keeps verdicts across runs (and output files),
+keyed like the live verdict cache, so only new or changed windows reach Gemini.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import sys
+import time
+
+OUTPUT_COLUMNS = [
+    'window_id', 'record_id', 'window_index', 'label', 'final', 'transcript', 'emotional', 'context',
+    'alert', 'tier', 'prescore', 'cached', 'errors', 'attempts', 'latency_ms', 'words'
+]
+
+
+def read_corpus(path):
+    """Yield (record_id, conversation, label) from a .jsonl or .csv file without loading it whole"""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith('.csv'):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for n, row in enumerate(rows):
+            text = row.get('conversation') or row.get('text') or ''
+            if isinstance(text, list):
+                text = ' '.join(text)
+            yield str(row.get('id', n)), text, row.get('label', '')
+
+
+def split_windows(text, max_words, overlap_words):
+    """Cut a conversation into live-sized windows, carrying overlap words like TranscriptWindow does"""
+    words = text.split()
+    if len(words) <= max_words:
+        return [text] if words else []
+    step = max(1, max_words - overlap_words)
+    return [' '.join(words[start:start + max_words]) for start in range(0, len(words) - overlap_words, step)]
+
+
+def completed_windows(path):
+    """Window ids already present in an existing output file"""
+    if not os.path.exists(path):
+        return set()
+    with open(path, newline='', encoding='utf-8') as f:
+        return {row['window_id'] for row in csv.DictReader(f)}
+
+
+class DiskCache:
+    """Append-only JSONL of key -> (final_score, agent_breakdown), loaded whole at start"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry['key']] = (entry['final'], entry['breakdown'])
+        self.file = open(path, 'a', encoding='utf-8') if path else None
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, final_score, breakdown):
+        self.entries[key] = (final_score, breakdown)
+        if self.file is not None:
+            self.file.write(json.dumps({'key': key, 'final': final_score, 'breakdown': breakdown}) + '\n')
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+class Pacer:
+    """
+    Spaces window starts to at most rps per second, and backs everyone off when
+    Gemini starts failing (429s and timeouts surface as agent errors)
+    """
+
+    def __init__(self, rps):
+        self.interval = 1.0 / rps if rps else 0.0
+        self.next_at = 0.0
+        self.backoff = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            now = time.monotonic()
+            start_at = max(now, self.next_at)
+            self.next_at = start_at + self.interval + self.backoff
+        await asyncio.sleep(start_at - now)
+
+    def failed(self):
+        self.backoff = min(30.0, max(0.1, self.backoff * 2))
+        self.next_at = max(self.next_at, time.monotonic() + self.backoff)
+
+    def succeeded(self):
+        self.backoff = self.backoff / 2 if self.backoff > 0.05 else 0.0
+
+
+async def score_window(handler, args, pacer, cache, key, window_id, record_id, index, text, label):
+    started = time.perf_counter()
+    attempts = 0
+    cached = cache.get(key)
+    if cached is not None and 'pending' in cached[1]:
+        cached = None  # partial early-exit verdict written by an older run; score it again
+    if cached is not None:
+        final_score, breakdown = cached
+        breakdown = {**breakdown, 'cached': True}
+    else:
+        while True:
+            attempts += 1
+            await pacer.wait()
+            try:
+                final_score, breakdown = await handler._analyze_conversation_safety(text)
+            except Exception as e:
+                final_score, breakdown = 0, {'errors': [type(e).__name__]}
+            # A breakdown with 'pending' agents is partial (early exit); never keep one
+            if 'errors' not in breakdown and 'pending' not in breakdown:
+                pacer.succeeded()
+                cache.put(key, final_score, {k: v for k, v in breakdown.items() if k != 'cached'})
+                break
+            pacer.failed()
+            if attempts > args.retries:
+                break
+
+    return {
+        'window_id': window_id,
+        'record_id': record_id,
+        'window_index': index,
+        'label': label,
+        'final': final_score,
+        'transcript': breakdown.get('transcript'),
+        'emotional': breakdown.get('emotional'),
+        'context': breakdown.get('context'),
+        'alert': int(final_score >= args.threshold),
+        'tier': breakdown.get('tier', ''),
+        'prescore': breakdown.get('prescore', ''),
+        'cached': int(bool(breakdown.get('cached'))),
+        'errors': ','.join(breakdown.get('errors', [])),
+        'attempts': attempts,
+        'latency_ms': round((time.perf_counter() - started) * 1000, 1),
+        'words': len(text.split()),
+    }
+
+
+async def main(args):
+    import live_stream_handler
+    from verdict_cache import VerdictCache
+    logging.getLogger().setLevel(logging.DEBUG if args.verbose else logging.WARNING)
+
+    handler = live_stream_handler.handler_instance
+    # Replays should be reproducible: no random calibration escalations
+    handler.calibration_sample_rate = 0.0
+    # Offline windows can queue as long as they need; the pacer handles backpressure
+    handler.routine_max_wait = None
+    # Tail latency doesn't matter offline, so don't spend quota on hedged duplicates
+    handler.hedge_after = 0
+    # Every row needs all agent scores, and background agents would be cancelled at exit
+    handler.early_exit_score = 0
+    if args.llm_only:
+        handler.prescorer = None
+    # Same key scheme as the live verdict cache, plus whether the local tier was in play
+    keys = handler.verdict_cache or VerdictCache()
+    key_mode = f"{handler.analysis_mode}:{'cascade' if handler.prescorer is not None else 'llm'}"
+
+    done = completed_windows(args.output)
+    cache = DiskCache(args.cache)
+    pacer = Pacer(args.rps)
+    queue = asyncio.Queue(maxsize=args.concurrency * 4)
+    stats = {'written': 0, 'skipped': 0, 'alerts': 0, 'errors': 0}
+    started = time.perf_counter()
+
+    new_file = not os.path.exists(args.output) or os.path.getsize(args.output) == 0
+    out = open(args.output, 'a', newline='', encoding='utf-8')
+    writer = csv.DictWriter(out, fieldnames=OUTPUT_COLUMNS)
+    if new_file:
+        writer.writeheader()
+
+    async def produce():
+        policy = handler.window_policy
+        for record_id, text, label in read_corpus(args.input):
+            for index, window in enumerate(split_windows(text, policy.max_words, policy.overlap_words)):
+                window_id = f'{record_id}#{index}'
+                if window_id in done:
+                    stats['skipped'] += 1
+                    continue
+                await queue.put((window_id, record_id, index, window, label))
+        for _ in range(args.concurrency):
+            await queue.put(None)
+
+    async def work():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            key = keys.make_key(item[3], handler.panic_codeword, key_mode)
+            row = await score_window(handler, args, pacer, cache, key, *item)
+            # Each row is flushed as it completes, so an interrupted run resumes where it stopped
+            writer.writerow(row)
+            out.flush()
+            stats['written'] += 1
+            stats['alerts'] += row['alert']
+            stats['errors'] += bool(row['errors'])
+            if stats['written'] % args.progress_every == 0:
+                rate = stats['written'] / (time.perf_counter() - started)
+                print(f"… {stats['written']} windows ({rate:.1f}/s), {stats['skipped']} already done",
+                      file=sys.stderr)
+
+    try:
+        await asyncio.gather(produce(), *(work() for _ in range(args.concurrency)))
+    finally:
+        out.close()
+        cache.close()
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        **stats,
+        'elapsed_s': round(elapsed, 2),
+        'windows_per_s': round(stats['written'] / elapsed, 2) if elapsed else None,
+        'agent_calls': handler.metrics.snapshot()['histograms'].get('agent_call_seconds'),
+    }
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+    return 1 if stats['errors'] else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('input', help='corpus (.jsonl or .csv)')
+    parser.add_argument('output', help='results CSV; also the resume checkpoint')
+    parser.add_argument('--concurrency', type=int, default=32, help='windows analyzed at once')
+    parser.add_argument('--rps', type=float, default=0.0, help='max windows started per second (0 = unlimited)')
+    parser.add_argument('--retries', type=int, default=3, help='re-runs for windows whose agents errored')
+    parser.add_argument('--threshold', type=int, default=70, help='final score that counts as an alert')
+    parser.add_argument('--cache', help='JSONL verdict cache shared across runs')
+    parser.add_argument('--llm-only', action='store_true', help='skip the local pre-score tier')
+    parser.add_argument('--progress-every', type=int, default=100)
+    parser.add_argument('--verbose', action='store_true', help='keep the handler\'s debug logging')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main(parse_args())))
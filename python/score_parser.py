@@ -0,0 +1,103 @@
+"""
+Score extraction for agent replies
+Agents are asked for a bare 0-100 number but sometimes answer "Score: 7/10", "85%"
+or a sentence. parse_score() reads those without mistaking stray digits (list
+markers, "3 agents", years) for the score, and ScoreStream lets a streamed reply be
+cut off as soon as it has opened with a complete score.
+"""
+import re
+
+# A number with an optional denominator ("7/10", "7 out of 10") or percent sign;
+# digits glued to letters, dots or longer numbers ("v2", "2024") are not candidates
+_NUMBER = r'(?<![\w.])(\d{1,3}(?:\.\d+)?)(?![\d])(?:\s*(?:/|out of)\s*(\d{1,3})(?![\d]))?(\s*%)?'
+SCORE_PATTERN = re.compile(_NUMBER, re.IGNORECASE)
+# A reply that starts with the score, optionally after a label like "Score:"
+LEADING_SCORE = re.compile(
+    r'[\s"\'*`]*(?:(?:final\s+|danger\s+)?(?:score|rating)\s*[:=-]?\s*)?' + _NUMBER,
+    re.IGNORECASE
+)
+# Words that introduce the score when the reply is a sentence
+SCORE_LABEL = re.compile(r'\b(?:score|rating|rate|rated|danger|risk|level|assessment)\b', re.IGNORECASE)
+# An explicit "score: N" / "rating = N" right before the number
+EXPLICIT_LABEL = re.compile(r'\b(?:score|rating)\s*[:=]\s*$', re.IGNORECASE)
+LABEL_REACH = 25  # chars between a label and the number it introduces
+
+
+def _value(match):
+    """0-100 score for a candidate match, or None if it can't be one"""
+    value = float(match.group(1))
+    denominator = match.group(2)
+    if denominator is not None:
+        if int(denominator) == 0:
+            return None
+        value = value / int(denominator) * 100
+    elif '.' in match.group(1) and value <= 1 and not match.group(3):
+        value *= 100  # "0.85" read as a probability
+    if value > 100:
+        return None
+    return int(round(value))
+
+
+def parse_score(text):
+    """
+    Score in a complete reply, or None when there is none or it is ambiguous
+    A lone number wins; otherwise one explicitly labeled ("Score: 85"), then the number
+    the reply opens with ("88. The caller mentions 2 threats"), then the number right
+    after a looser label ("rate", "danger", ...), then one written as a fraction or percentage
+    """
+    candidates = [(match, _value(match)) for match in SCORE_PATTERN.finditer(text or '')]
+    candidates = [(match, value) for match, value in candidates if value is not None]
+    if not candidates:
+        return None
+    if len(candidates) == 1:
+        return candidates[0][1]
+    for match, value in candidates:
+        if EXPLICIT_LABEL.search(text[max(0, match.start() - LABEL_REACH):match.start()]):
+            return value
+    leading = LEADING_SCORE.match(text)
+    if leading is not None and _value(leading) is not None:
+        return _value(leading)
+    for match, value in candidates:
+        before = text[max(0, match.start() - LABEL_REACH):match.start()]
+        if SCORE_LABEL.search(before):
+            return value
+    for match, value in candidates:
+        if match.group(2) is not None or match.group(3):
+            return value
+    return None
+
+
+def _closed(rest):
+    """True when the text after a leading number shows it can't grow into another score"""
+    rest = rest.lstrip()
+    if not rest:
+        return False
+    lowered = rest.lower()
+    if rest[0] in '/%' or 'out of'.startswith(lowered[:6]):
+        return False  # a denominator or percent sign may still be arriving
+    # "7." may become "7.5", and "1." / "1)" / "1:" open a list rather than give a score,
+    # so those replies are read to the end and parsed whole
+    return rest[0] not in '.):'
+
+
+class ScoreStream:
+    """Accumulates a streamed agent reply and says when its leading score is complete"""
+
+    __slots__ = ('text', 'score_text')
+
+    def __init__(self):
+        self.text = ''
+        self.score_text = None
+
+    def feed(self, chunk):
+        """Add a chunk; True once the reply has opened with a complete score (stop reading)"""
+        self.text += chunk
+        match = LEADING_SCORE.match(self.text)
+        if match is None or _value(match) is None or not _closed(self.text[match.end():]):
+            return False
+        self.score_text = match.group(0).strip(' \t\n"\'*`')
+        return True
+
+    def result(self):
+        """The leading score text if the stream was cut short, else the whole reply"""
+        return self.score_text if self.score_text is not None else self.text.strip()
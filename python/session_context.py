@@ -0,0 +1,84 @@
+"""
+Incremental per-session analysis context
+Each window is still analyzed on its own text (only what was said since the last
+flush, plus the overlap carry), but alongside a bounded summary of the session so
+far: the last few scores and notes on the moments that scored high. The summary is
+updated locally after every window, so the prompt stays the same size however long
+the session runs and escalation that builds over minutes stays visible.
+"""
+import collections
+import time
+
+
+class SessionContext:
+    """
+    Rolling summary for one session
+    scores holds the last max_notes window scores; notes holds the last max_notes
+    windows that scored at least note_threshold, and the peak note is kept even
+    after it rolls off
+    """
+
+    __slots__ = ('max_notes', 'note_threshold', 'excerpt_chars', 'started_at', 'windows',
+                 'scores', 'notes', 'peak')
+
+    def __init__(self, max_notes=6, note_threshold=40, excerpt_chars=120, now=None):
+        self.max_notes = max_notes
+        self.note_threshold = note_threshold
+        self.excerpt_chars = excerpt_chars
+        self.started_at = time.monotonic() if now is None else now
+        self.windows = 0
+        self.scores = collections.deque(maxlen=max_notes)
+        self.notes = collections.deque(maxlen=max_notes)  # (minutes into session, score, detail)
+        self.peak = None
+
+    def record(self, conversation, final_score, risk_terms=(), rationale=None, now=None):
+        """Fold one analyzed window into the summary"""
+        now = time.monotonic() if now is None else now
+        self.windows += 1
+        self.scores.append(final_score)
+        if final_score < self.note_threshold:
+            return
+        detail = rationale or f'"{self._excerpt(conversation)}"'
+        if risk_terms:
+            detail += f" (risk words: {', '.join(sorted(set(risk_terms)))})"
+        note = ((now - self.started_at) / 60, final_score, self._excerpt(detail, 2))
+        self.notes.append(note)
+        if self.peak is None or final_score >= self.peak[1]:
+            self.peak = note
+
+    def recent_peak(self):
+        return max(self.scores, default=0)
+
+    def trend(self):
+        if len(self.scores) < 2:
+            return 'steady'
+        change = self.scores[-1] - self.scores[0]
+        if change >= 15:
+            return 'rising'
+        if change <= -15:
+            return 'falling'
+        return 'steady'
+
+    def summary(self):
+        """
+        Prompt text for the next window; '' while nothing in the session has scored
+        note_threshold, so calm sessions send (and cache) exactly what they did before
+        """
+        if self.peak is None:
+            return ''
+        scores = ' -> '.join(str(score) for score in self.scores)
+        lines = [f"{self.windows} earlier windows; recent danger scores, oldest first: {scores} ({self.trend()})"]
+        if self.peak not in self.notes:
+            lines.append(self._note_line('peak', self.peak))
+        lines.extend(self._note_line('', note) for note in self.notes)
+        return '\n'.join(lines)
+
+    def _note_line(self, label, note):
+        minutes, score, detail = note
+        prefix = f"{label} " if label else ''
+        return f"- {prefix}{minutes:.1f} min in, scored {score}/100: {detail}"
+
+    def _excerpt(self, text, scale=1):
+        limit = self.excerpt_chars * scale
+        text = ' '.join(text.split())
+        return text if len(text) <= limit else '...' + text[-limit:]
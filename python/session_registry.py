@@ -0,0 +1,142 @@
+"""
+Session registry
+All per-session state lives in one __slots__ object held in a single dict,
+instead of parallel dicts keyed by session_id
+"""
+import os
+import resource
+import sys
+import time
+
+
+class Session:
+    """State for one monitoring session (slots keep the per-session footprint small)"""
+
+    __slots__ = (
+        'session_id',
+        'live_session',      # Gemini Live session object, None until audio/video arrives
+        'context_manager',   # live.connect() context manager, closed on stop or media idle
+        'listen_task',       # _listen_for_responses task
+        'live_task',         # in-progress Live connect, shared by frames that arrive during it
+        'live_retry_at',     # monotonic time before which a failed connect is not retried
+        'window',            # TranscriptWindow (flushed by the shared WindowScheduler)
+        'context',           # SessionContext: rolling summary sent with each window's analysis
+        'incident',          # current/last Incident, merging detections from every source
+        'codeword_stream',   # CodewordStream (local matcher state)
+        'stream',            # SessionStream when a WebSocket is attached
+        'decoder',           # AudioDecoder once audio arrives
+        'decoder_restarts',  # replacements started after the decoder process exited
+        'vad_gate',          # VoiceActivityGate once audio arrives
+        'started_at',
+        'last_activity',
+        'last_media',        # last audio/video chunk, drives the Live idle teardown
+    )
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.live_session = None
+        self.context_manager = None
+        self.listen_task = None
+        self.live_task = None
+        self.live_retry_at = 0.0
+        self.window = None
+        self.context = None
+        self.incident = None
+        self.codeword_stream = None
+        self.stream = None
+        self.decoder = None
+        self.decoder_restarts = 0
+        self.vad_gate = None
+        self.started_at = time.monotonic()
+        self.last_activity = self.started_at
+        self.last_media = None
+
+    def touch(self):
+        self.last_activity = time.monotonic()
+
+    def buffered_bytes(self):
+        """Transcript and decoded-audio bytes currently held for this session"""
+        transcript = self.window.bytes if self.window is not None else 0
+        audio = self.decoder.buffered_bytes() if self.decoder is not None else 0
+        return transcript, audio
+
+
+def process_rss_bytes():
+    """Current resident set size; falls back to peak RSS where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class SessionRegistry:
+    def __init__(self):
+        self.sessions = {}
+        self.rss_baseline = process_rss_bytes()
+
+    def mark_baseline(self):
+        """Record the process RSS with no sessions (call once the server is up) for per-session accounting"""
+        self.rss_baseline = process_rss_bytes()
+
+    def __contains__(self, session_id):
+        return session_id in self.sessions
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def get(self, session_id):
+        return self.sessions.get(session_id)
+
+    def add(self, session):
+        self.sessions[session.session_id] = session
+
+    def pop(self, session_id):
+        return self.sessions.pop(session_id, None)
+
+    def values(self):
+        return list(self.sessions.values())
+
+    def idle_since(self, cutoff):
+        """Ids of sessions with no activity since cutoff (sessions with an open socket are never idle)"""
+        return [
+            session.session_id for session in self.sessions.values()
+            if session.last_activity < cutoff and session.stream is None
+        ]
+
+    def media_idle_since(self, cutoff):
+        """Sessions holding a Live connection that have had no audio/video since cutoff"""
+        return [
+            session for session in self.sessions.values()
+            if session.live_session is not None and (session.last_media or 0.0) < cutoff
+        ]
+
+    def has_media_since(self, cutoff):
+        """Whether any session has sent audio/video since cutoff"""
+        return any((session.last_media or 0.0) >= cutoff for session in self.sessions.values())
+
+    def live_count(self):
+        return sum(1 for session in self.sessions.values() if session.live_session is not None)
+
+    def memory_report(self):
+        """Per-process memory accounting for /health"""
+        transcript_bytes = 0
+        audio_bytes = 0
+        for session in self.sessions.values():
+            transcript, audio = session.buffered_bytes()
+            transcript_bytes += transcript
+            audio_bytes += audio
+        rss = process_rss_bytes()
+        count = len(self.sessions)
+        return {
+            'rss_bytes': rss,
+            'rss_baseline_bytes': self.rss_baseline,
+            'sessions': count,
+            'live_connections': self.live_count(),
+            'transcript_buffer_bytes': transcript_bytes,
+            'audio_buffer_bytes': audio_bytes,
+            # Growth over the startup baseline, so interpreter and library memory isn't billed to sessions
+            'rss_per_session_bytes': max(0, rss - self.rss_baseline) // count if count else None
+        }
@@ -14,6 +14,11 @@ pip install --upgrade pip
 # Install requirements
 pip install -r requirements.txt
 
+# Audio streaming decodes WebM/Opus with ffmpeg
+if ! command -v ffmpeg >/dev/null 2>&1; then
+    echo "⚠️  ffmpeg not found - audio chunks will not reach Gemini Live until it is installed"
+fi
+
 echo "✅ Python environment setup complete!"
 echo ""
 echo "To activate the virtual environment in the future, run:"
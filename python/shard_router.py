@@ -0,0 +1,321 @@
+"""
+Session-affine multi-process front end
+Runs N worker processes (each a full LiveStreamHandler with its own event loop)
+and a thin router on the public port. Every request for a session is proxied to
+the worker chosen by hashing its session_id, so start/audio/text/stop and the
+stream socket always land on the process that holds the session's state.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+
+import aiohttp
+from aiohttp import web, WSMsgType
+
+logger = logging.getLogger(__name__)
+
+# Not forwarded between router and worker (aiohttp sets its own framing/encoding)
+HOP_BY_HOP_HEADERS = {
+    'connection', 'keep-alive', 'transfer-encoding', 'content-length',
+    'content-encoding', 'upgrade', 'host'
+}
+
+
+def shard_for(session_id, shard_count):
+    """
+    Rendezvous (highest random weight) hash of session_id onto [0, shard_count)
+    Uses a stable digest rather than hash(), which is randomized per process
+    """
+    def weight(shard):
+        return hashlib.blake2b(f'{shard}:{session_id}'.encode(), digest_size=8).digest()
+    return max(range(shard_count), key=weight)
+
+
+def merge_prometheus(worker_texts):
+    """
+    Combine (worker index, /metrics text) pairs into one exposition, adding worker="index"
+    to every sample and keeping each metric's samples together under its HELP/TYPE lines
+    """
+    families = {}  # metric name -> {'headers': [...], 'samples': [...]}, in first-seen order
+    for index, text in worker_texts:
+        family = None
+        for line in text.splitlines():
+            if not line:
+                continue
+            if line.startswith('#'):
+                name = line.split(' ', 3)[2]
+                family = families.setdefault(name, {'headers': [], 'samples': []})
+                if line not in family['headers']:
+                    family['headers'].append(line)
+                continue
+            sample, value = line.rsplit(' ', 1)
+            if sample.endswith('}'):
+                sample = f'{sample[:-1]},worker="{index}"}}'
+            else:
+                sample = f'{sample}{{worker="{index}"}}'
+            family['samples'].append(f'{sample} {value}')
+
+    lines = []
+    for family in families.values():
+        lines.extend(family['headers'])
+        lines.extend(family['samples'])
+    return '\n'.join(lines) + '\n'
+
+
+def merge_health(reports):
+    """Sum numeric fields across worker /health reports (recursing into dicts); other values come from the first"""
+    merged = {}
+    for report in reports:
+        for key, value in report.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float, dict)):
+                merged.setdefault(key, value)
+            elif isinstance(value, dict):
+                merged[key] = merge_health([merged.get(key) or {}, value])
+            else:
+                merged[key] = (merged.get(key) or 0) + value
+    return merged
+
+
+class WorkerProcess:
+    """One supervised worker: restarted with backoff if it exits unexpectedly"""
+
+    def __init__(self, index, port, command):
+        self.index = index
+        self.port = port
+        self.command = command
+        self.process = None
+        self.task = None
+        self.restarts = 0
+        self.stopping = False
+
+    async def spawn(self):
+        env = {**os.environ, 'WORKER_PORT': str(self.port), 'WORKER_INDEX': str(self.index)}
+        self.process = await asyncio.create_subprocess_exec(*self.command, env=env)
+        logger.info(f"👷 Worker {self.index} started on port {self.port} (pid {self.process.pid})")
+
+    async def supervise(self):
+        while True:
+            returncode = await self.process.wait()
+            if self.stopping:
+                return
+            self.restarts += 1
+            logger.error(f"❌ Worker {self.index} exited with code {returncode}; restarting (sessions on it are lost)")
+            await asyncio.sleep(min(30.0, 1.0 * self.restarts))
+            await self.spawn()
+
+    async def stop(self):
+        self.stopping = True
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+        if self.process is not None and self.process.returncode is None:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=10)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+
+
+class ShardRouter:
+    """
+    command is the argv that runs one worker; it reads its port from WORKER_PORT
+    """
+
+    def __init__(self, command, workers=2, base_port=5101, ready_timeout=30.0):
+        self.workers = [WorkerProcess(i, base_port + i, command) for i in range(workers)]
+        self.ready_timeout = ready_timeout
+        self.client = None
+
+        self.stats = {
+            'proxied': 0,
+            'streams': 0,
+            'upstream_errors': 0,
+        }
+
+    def worker_for(self, session_id):
+        return self.workers[shard_for(session_id or '', len(self.workers))]
+
+    async def start(self):
+        """Spawn the workers and wait until each one answers /health"""
+        self.client = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60))
+        for worker in self.workers:
+            await worker.spawn()
+        await asyncio.gather(*(self._wait_ready(worker) for worker in self.workers))
+        for worker in self.workers:
+            worker.task = asyncio.create_task(worker.supervise())
+        logger.info(f"🔀 Shard router ready with {len(self.workers)} workers")
+
+    async def close(self):
+        await asyncio.gather(*(worker.stop() for worker in self.workers))
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+
+    async def _wait_ready(self, worker):
+        deadline = asyncio.get_running_loop().time() + self.ready_timeout
+        while True:
+            try:
+                async with self.client.get(f'http://127.0.0.1:{worker.port}/health') as resp:
+                    if resp.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            if asyncio.get_running_loop().time() > deadline:
+                raise RuntimeError(f"worker {worker.index} did not become ready on port {worker.port}")
+            await asyncio.sleep(0.2)
+
+    async def handle_proxy(self, request):
+        """Forward an HTTP request to the session's worker"""
+        body = await request.read()
+        session_id = request.match_info.get('session_id')
+        if session_id is None and body:
+            # /session/start carries the id in its JSON body
+            try:
+                session_id = json.loads(body).get('session_id')
+            except (ValueError, AttributeError):
+                session_id = None
+        worker = self.worker_for(session_id)
+
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in HOP_BY_HOP_HEADERS}
+        url = f'http://127.0.0.1:{worker.port}{request.rel_url}'
+        try:
+            async with self.client.request(request.method, url, data=body, headers=headers) as resp:
+                payload = await resp.read()
+                self.stats['proxied'] += 1
+                response_headers = {k: v for k, v in resp.headers.items() if k.lower() not in HOP_BY_HOP_HEADERS}
+                return web.Response(body=payload, status=resp.status, headers=response_headers)
+        except aiohttp.ClientError as e:
+            self.stats['upstream_errors'] += 1
+            logger.error(f"❌ Worker {worker.index} unreachable for {request.path}: {e}")
+            return web.json_response({'status': 'error', 'error': 'Worker unavailable'}, status=502)
+
+    async def handle_stream(self, request):
+        """Relay a session WebSocket to the session's worker, frame for frame"""
+        session_id = request.match_info.get('session_id')
+        worker = self.worker_for(session_id)
+        ws = web.WebSocketResponse(heartbeat=20, max_msg_size=4 * 1024 * 1024)
+        await ws.prepare(request)
+
+        url = f'ws://127.0.0.1:{worker.port}{request.rel_url}'
+        try:
+            upstream = await self.client.ws_connect(url, max_msg_size=4 * 1024 * 1024)
+        except aiohttp.ClientError as e:
+            self.stats['upstream_errors'] += 1
+            logger.error(f"❌ Worker {worker.index} unreachable for stream {session_id}: {e}")
+            await ws.send_json({'type': 'error', 'error': 'Worker unavailable', 'session_id': session_id})
+            await ws.close()
+            return ws
+
+        self.stats['streams'] += 1
+        relays = [
+            asyncio.create_task(self._relay(ws, upstream)),
+            asyncio.create_task(self._relay(upstream, ws)),
+        ]
+        try:
+            await asyncio.wait(relays, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in relays:
+                task.cancel()
+            await asyncio.gather(*relays, return_exceptions=True)
+            await upstream.close()
+            await ws.close()
+        return ws
+
+    async def _relay(self, source, destination):
+        async for msg in source:
+            if msg.type == WSMsgType.BINARY:
+                await destination.send_bytes(msg.data)
+            elif msg.type == WSMsgType.TEXT:
+                await destination.send_str(msg.data)
+            else:
+                break
+
+    async def handle_health(self, request):
+        """Health of every worker plus totals across them"""
+        async def fetch(worker):
+            try:
+                async with self.client.get(f'http://127.0.0.1:{worker.port}/health') as resp:
+                    return await resp.json()
+            except (aiohttp.ClientError, ValueError) as e:
+                return {'status': 'unreachable', 'error': str(e)}
+
+        reports = await asyncio.gather(*(fetch(worker) for worker in self.workers))
+        healthy = [report for report in reports if report.get('status') == 'healthy']
+        totals = merge_health(healthy)
+        # Ratios don't sum; recompute them from the summed counters
+        memory = totals.get('memory')
+        if memory:
+            sessions = memory.get('sessions') or 0
+            growth = max(0, memory['rss_bytes'] - memory.get('rss_baseline_bytes', 0))
+            memory['rss_per_session_bytes'] = growth // sessions if sessions else None
+        cache = totals.get('verdict_cache')
+        if cache:
+            lookups = cache['hits'] + cache['misses']
+            cache['hit_rate'] = round(cache['hits'] / lookups, 3) if lookups else 0.0
+        batcher = totals.get('analysis_batcher')
+        if batcher:
+            batcher['avg_batch_size'] = round(batcher['items'] / batcher['batches'], 2) if batcher['batches'] else 0.0
+
+        return web.json_response({
+            **totals,
+            'status': 'healthy' if len(healthy) == len(self.workers) else 'degraded',
+            'router': self.stats,
+            'workers': [
+                {
+                    'index': worker.index,
+                    'port': worker.port,
+                    'pid': worker.process.pid if worker.process else None,
+                    'restarts': worker.restarts,
+                    'status': report.get('status'),
+                    'active_sessions': report.get('active_sessions'),
+                }
+                for worker, report in zip(self.workers, reports)
+            ]
+        })
+
+
+    async def handle_metrics(self, request):
+        """Every worker's metrics, labelled by worker (JSON keeps them as a list)"""
+        json_format = request.query.get('format') == 'json'
+
+        async def fetch(worker):
+            try:
+                async with self.client.get(f'http://127.0.0.1:{worker.port}/metrics', params=request.query) as resp:
+                    return await resp.json() if json_format else await resp.text()
+            except (aiohttp.ClientError, ValueError) as e:
+                logger.error(f"❌ Worker {worker.index} metrics unavailable: {e}")
+                return None
+
+        results = await asyncio.gather(*(fetch(worker) for worker in self.workers))
+        if json_format:
+            return web.json_response({
+                'router': self.stats,
+                'workers': [{'index': worker.index, 'metrics': result} for worker, result in zip(self.workers, results)]
+            })
+
+        texts = [(worker.index, text) for worker, text in zip(self.workers, results) if text is not None]
+        return web.Response(text=merge_prometheus(texts), content_type='text/plain')
+
+
+def create_router_app(router):
+    app = web.Application()
+
+    async def on_startup(app):
+        await router.start()
+
+    async def on_cleanup(app):
+        await router.close()
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+
+    app.router.add_get('/health', router.handle_health)
+    app.router.add_get('/metrics', router.handle_metrics)
+    app.router.add_get('/session/{session_id}/stream', router.handle_stream)
+    # Everything else (including CORS preflights) is answered by the worker, headers and all
+    app.router.add_route('*', '/session/start', router.handle_proxy)
+    app.router.add_route('*', '/session/{session_id}/{action}', router.handle_proxy)
+    return app
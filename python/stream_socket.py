@@ -0,0 +1,56 @@
+"""
+Per-session WebSocket stream
+One long-lived socket carries audio/text chunks in and analysis/detection
+events out, instead of an HTTP request per chunk and a POST per event
+"""
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStream:
+    """
+    Outbound side of a session socket
+    Events go through a bounded queue drained by one writer task; when the client
+    reads too slowly, pending status events are dropped but alerts never are
+    """
+
+    def __init__(self, ws, replaces_http=False, max_pending=64):
+        self.ws = ws
+        self.replaces_http = replaces_http
+        self.max_pending = max_pending
+        self.outbound = asyncio.Queue()
+        self.writer_task = asyncio.create_task(self._writer())
+        self.dropped = 0
+
+    def push(self, data):
+        event = {**data, 'type': data.get('type', 'alert')}
+        if self.outbound.qsize() >= self.max_pending and event['type'] != 'alert':
+            self.dropped += 1
+            return
+        self.outbound.put_nowait(event)
+
+    async def _writer(self):
+        while True:
+            event = await self.outbound.get()
+            if self.ws.closed:
+                # Leave it for close() so queued alerts can be rerouted
+                self.outbound.put_nowait(event)
+                return
+            try:
+                # send_json waits for the transport to drain, so a slow reader slows only this task
+                await self.ws.send_json(event)
+            except Exception as e:
+                logger.error(f"❌ Error pushing event on session socket: {e}")
+
+    async def close(self):
+        """Stop the writer; returns alerts that were still queued so they can go out another way"""
+        self.writer_task.cancel()
+        await asyncio.gather(self.writer_task, return_exceptions=True)
+        undelivered = []
+        while not self.outbound.empty():
+            event = self.outbound.get_nowait()
+            if event['type'] == 'alert':
+                undelivered.append(event)
+        return undelivered
@@ -0,0 +1,132 @@
+"""
+Unit tests for the local codeword matcher
+Run from python/: python -m pytest -q test_codeword_matcher.py
+"""
+import pytest
+
+from codeword_matcher import (
+    MAX_CODEWORD_WORDS, MAX_SESSION_CODEWORDS, CodewordIndex, CodewordStream, phonetic_key, tokenize,
+    validate_codewords, within_one_edit
+)
+
+CODEWORD = 'help me mom'
+
+
+def feed_all(stream, *chunks):
+    matches = []
+    for chunk in chunks:
+        matches.extend(stream.feed(chunk))
+    return matches
+
+
+def test_tokenize_strips_case_and_punctuation():
+    assert tokenize("Help ME, mom!! 'please'") == ['help', 'me', 'mom', 'please']
+
+
+def test_exact_match():
+    matches = CodewordStream(CodewordIndex([CODEWORD])).feed('please help me mom now')
+    assert len(matches) == 1
+    assert matches[0]['phrase'] == CODEWORD
+    assert matches[0]['match_type'] == 'exact'
+    assert matches[0]['confidence'] == 1.0
+
+
+def test_match_split_across_chunks():
+    stream = CodewordStream(CodewordIndex([CODEWORD]))
+    matches = feed_all(stream, 'I said help', 'me', 'mom.')
+    assert [m['heard'] for m in matches] == [CODEWORD]
+
+
+def test_no_match_across_unrelated_word():
+    stream = CodewordStream(CodewordIndex([CODEWORD]))
+    assert feed_all(stream, 'help me', 'call', 'mom') == []
+
+
+def test_partial_phrase_does_not_match():
+    assert CodewordStream(CodewordIndex([CODEWORD])).feed('help me please') == []
+
+
+def test_exact_only_by_default():
+    stream = CodewordStream(CodewordIndex([CODEWORD]))
+    assert stream.feed('help me mum') == []
+
+
+@pytest.mark.parametrize('text', [
+    'help me man',
+    'help me, money',
+    'help me many times',
+    'help me, mine is broken',
+])
+def test_soundex_collisions_are_not_matches(text):
+    # mom, man, money, many and mine share a Soundex code but are different words
+    assert phonetic_key('mom') == phonetic_key(tokenize(text)[2])
+    assert CodewordStream(CodewordIndex([CODEWORD], fuzzy=True)).feed(text) == []
+
+
+@pytest.mark.parametrize('text', ['help me mum', 'halp me mom', 'help mi mom'])
+def test_near_miss_is_phonetic(text):
+    matches = CodewordStream(CodewordIndex([CODEWORD], fuzzy=True)).feed(text)
+    assert len(matches) == 1
+    assert matches[0]['match_type'] == 'phonetic'
+    assert matches[0]['confidence'] < 1.0
+
+
+def test_fuzzy_index_still_reports_exact():
+    matches = CodewordStream(CodewordIndex([CODEWORD], fuzzy=True)).feed('help me mom')
+    assert matches[0]['match_type'] == 'exact'
+
+
+def test_near_miss_split_across_chunks():
+    stream = CodewordStream(CodewordIndex([CODEWORD], fuzzy=True))
+    matches = feed_all(stream, 'help', 'me mum')
+    assert [(m['heard'], m['match_type']) for m in matches] == [('help me mum', 'phonetic')]
+
+
+def test_overlapping_phrases():
+    index = CodewordIndex([CODEWORD, 'me mom', 'red balloon'])
+    stream = CodewordStream(index)
+    phrases = sorted(m['phrase'] for m in stream.feed('help me mom'))
+    assert phrases == ['help me mom', 'me mom']
+    assert [m['phrase'] for m in stream.feed('the red')] == []
+    assert [m['phrase'] for m in stream.feed('balloon')] == ['red balloon']
+
+
+def test_repeated_phrase_matches_again():
+    stream = CodewordStream(CodewordIndex([CODEWORD]))
+    assert len(feed_all(stream, 'help me mom', 'help me mom')) == 2
+
+
+def test_duplicate_and_empty_phrases_are_ignored():
+    index = CodewordIndex([CODEWORD, 'Help me, mom!', '   '])
+    assert [tokens for _, tokens in index.phrases] == [('help', 'me', 'mom')]
+
+
+@pytest.mark.parametrize('a, b, expected', [
+    ('mom', 'mom', True),
+    ('mom', 'mum', True),
+    ('mom', 'moms', True),
+    ('mom', 'om', True),
+    ('mom', 'man', False),
+    ('mom', 'mine', False),
+    ('mom', 'money', False),
+])
+def test_within_one_edit(a, b, expected):
+    assert within_one_edit(a, b) is expected
+
+
+def test_validate_codewords_accepts_phrase_list():
+    assert validate_codewords(None) == []
+    assert validate_codewords(['help me dad', 'pineapple']) == ['help me dad', 'pineapple']
+
+
+@pytest.mark.parametrize('codewords', [
+    'help me dad',  # a bare string would become single-letter codewords
+    {'phrase': 'help me dad'},
+    ['help me dad', 3],
+    ['help me dad', '  '],
+    ['word'] * (MAX_SESSION_CODEWORDS + 1),
+    [' '.join(['word'] * (MAX_CODEWORD_WORDS + 1))],
+])
+def test_validate_codewords_rejects(codewords):
+    with pytest.raises(ValueError):
+        validate_codewords(codewords)
@@ -0,0 +1,83 @@
+"""
+Unit tests for agent score parsing
+Run from python/: python -m pytest -q test_score_parser.py
+"""
+import pytest
+
+from score_parser import ScoreStream, parse_score
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('85', 85),
+    ('  85\n', 85),
+    ('0', 0),
+    ('100', 100),
+    ('0.85', 85),
+])
+def test_bare_number(text, expected):
+    assert parse_score(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Score: 85', 85),
+    ('**Score: 72** (3 red flags)', 72),
+    ('Danger rating = 40, based on 2 phrases', 40),
+    ('The caller repeats 3 times. Score: 90', 90),
+    ('I would rate this 75 given 2 threats', 75),
+])
+def test_labeled_score(text, expected):
+    assert parse_score(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('7/10', 70),
+    ('Score: 7 out of 10', 70),
+    ('85%', 85),
+    ('I see 2 threats, so 60%', 60),
+    ('3/0', None),
+])
+def test_fraction_and_percent(text, expected):
+    assert parse_score(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('88. The caller mentions 2 threats', 88),
+    ('75 - the speaker sounds scared and says stop 3 times', 75),
+    ('40\n\nThe transcript has 2 risk words', 40),
+])
+def test_leading_score_with_trailing_sentence(text, expected):
+    assert parse_score(text) == expected
+
+
+def test_list_reply_uses_explicit_label():
+    assert parse_score('1. Transcript is calm\n2. Emotion is tense\n3. Score: 85') == 85
+
+
+@pytest.mark.parametrize('text', ['', None, 'no score here', 'v2 of the model', '150'])
+def test_no_score(text):
+    assert parse_score(text) is None
+
+
+def test_stream_cuts_after_complete_score():
+    stream = ScoreStream()
+    assert not stream.feed('8')
+    assert stream.feed('5\n\nThe transcript')
+    assert stream.result() == '85'
+
+
+def test_stream_waits_for_denominator():
+    stream = ScoreStream()
+    assert not stream.feed('7')
+    assert not stream.feed('/')
+    assert stream.feed('10 because')
+    assert parse_score(stream.result()) == 70
+
+
+@pytest.mark.parametrize('chunks, expected', [
+    (['88', '. The caller mentions 2 threats'], 88),
+    (['1', '. Calm\n2. Score: 85'], 85),
+])
+def test_stream_reads_list_or_sentence_to_the_end(chunks, expected):
+    stream = ScoreStream()
+    assert not any(stream.feed(chunk) for chunk in chunks)
+    assert parse_score(stream.result()) == expected
@@ -0,0 +1,102 @@
+"""
+Voice-activity gate for the Live audio path
+Energy + zero-crossing-rate classifier over 16-bit PCM frames, so only speech
+(plus a little context) is uploaded to Gemini and silence is dropped locally
+"""
+import collections
+import math
+from array import array
+
+from audio_pipeline import PCM_SAMPLE_RATE
+
+
+def frame_features(samples):
+    """RMS energy and zero-crossing rate of a block of int16 samples"""
+    if not samples:
+        return 0.0, 0.0
+    energy = math.sqrt(sum(s * s for s in samples) / len(samples))
+    crossings = 0
+    prev = samples[0]
+    for s in samples:
+        if (s >= 0) != (prev >= 0):
+            crossings += 1
+        prev = s
+    return energy, crossings / len(samples)
+
+
+class VoiceActivityGate:
+    """
+    Decides per 20 ms block whether audio is speech
+    - threshold adapts to the background: speech must be ratio x the tracked noise floor
+    - very high ZCR with low energy is treated as hiss, not speech
+    - pre-roll: the last few silent blocks are sent ahead of a speech onset
+    - hangover: audio keeps flowing briefly after speech stops so word endings aren't clipped
+    """
+
+    def __init__(self, block_ms=20, min_energy=300.0, noise_ratio=3.0, max_zcr=0.35,
+                 preroll_ms=200, hangover_ms=400):
+        self.block_bytes = PCM_SAMPLE_RATE * 2 * block_ms // 1000
+        self.min_energy = min_energy
+        self.noise_ratio = noise_ratio
+        self.max_zcr = max_zcr
+        self.preroll = collections.deque(maxlen=max(1, preroll_ms // block_ms))
+        self.hangover_blocks = max(1, hangover_ms // block_ms)
+
+        self.noise_floor = min_energy / noise_ratio
+        self.hangover_left = 0
+        self.active = False
+        self.remainder = b''
+
+        self.stats = {
+            'blocks_in': 0,
+            'blocks_forwarded': 0,
+            'blocks_dropped': 0,
+            'speech_segments': 0,
+        }
+
+    def is_speech(self, block):
+        samples = array('h', block)
+        energy, zcr = frame_features(samples)
+        threshold = max(self.min_energy, self.noise_floor * self.noise_ratio)
+        speech = energy >= threshold and (zcr <= self.max_zcr or energy >= threshold * 2)
+        if not speech:
+            # Track the background level slowly so the gate adapts to the room
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * energy
+        return speech
+
+    def process(self, pcm):
+        """
+        Feed a PCM frame; returns (audio to forward, segment_ended)
+        segment_ended is True when the gate closes after a speech segment
+        """
+        data = self.remainder + pcm
+        usable = len(data) - len(data) % self.block_bytes
+        self.remainder = data[usable:]
+
+        out = []
+        segment_ended = False
+        for offset in range(0, usable, self.block_bytes):
+            block = data[offset:offset + self.block_bytes]
+            self.stats['blocks_in'] += 1
+            if self.is_speech(block):
+                if not self.active:
+                    self.active = True
+                    self.stats['speech_segments'] += 1
+                    out.extend(self.preroll)
+                    self.stats['blocks_forwarded'] += len(self.preroll)
+                    self.preroll.clear()
+                self.hangover_left = self.hangover_blocks
+                out.append(block)
+                self.stats['blocks_forwarded'] += 1
+            elif self.active and self.hangover_left > 0:
+                self.hangover_left -= 1
+                out.append(block)
+                self.stats['blocks_forwarded'] += 1
+                if self.hangover_left == 0:
+                    self.active = False
+                    segment_ended = True
+            else:
+                if len(self.preroll) == self.preroll.maxlen:
+                    self.stats['blocks_dropped'] += 1
+                self.preroll.append(block)
+        return b''.join(out), segment_ended
@@ -0,0 +1,83 @@
+"""
+Content-addressed cache for safety verdicts
+Identical (normalized) conversation windows reuse the previous
+(final_score, agent_breakdown) instead of paying for another round of agent calls
+"""
+import copy
+import hashlib
+import time
+from collections import OrderedDict
+
+from codeword_matcher import tokenize
+
+# Bump when agent prompts or scoring logic change so stale verdicts are not reused
+PROMPT_VERSION = 'v3'
+
+
+def normalize_conversation(conversation):
+    """Case/punctuation/whitespace-insensitive form used for the cache key"""
+    return ' '.join(tokenize(conversation))
+
+
+class VerdictCache:
+    """
+    LRU + TTL cache of analysis results
+    Benign verdicts (score below benign_threshold) are kept longer as negative
+    cache entries, since filler like "okay" or "can you hear me" repeats constantly
+    """
+
+    def __init__(self, max_entries=2048, ttl=300.0, negative_ttl=1800.0, benign_threshold=20):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.benign_threshold = benign_threshold
+        self.entries = OrderedDict()  # key -> (expires_at, final_score, agent_breakdown)
+
+        self.stats = {
+            'hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+        }
+
+    def make_key(self, conversation, codeword, mode, context=''):
+        """context is the session summary sent with the window; calm sessions pass '' and share entries"""
+        raw = '\x1f'.join((PROMPT_VERSION, mode, codeword.lower(), normalize_conversation(conversation), context))
+        return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+    def get(self, key, now=None):
+        """Cached (final_score, agent_breakdown) or None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+        now = time.monotonic() if now is None else now
+        expires_at, final_score, agent_breakdown = entry
+        if now >= expires_at:
+            del self.entries[key]
+            self.stats['expirations'] += 1
+            self.stats['misses'] += 1
+            return None
+        self.entries.move_to_end(key)
+        self.stats['hits'] += 1
+        if final_score < self.benign_threshold:
+            self.stats['negative_hits'] += 1
+        return final_score, copy.deepcopy(agent_breakdown)
+
+    def put(self, key, final_score, agent_breakdown, now=None):
+        now = time.monotonic() if now is None else now
+        ttl = self.negative_ttl if final_score < self.benign_threshold else self.ttl
+        self.entries[key] = (now + ttl, final_score, copy.deepcopy(agent_breakdown))
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def snapshot(self):
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'size': len(self.entries),
+            'hit_rate': round(self.stats['hits'] / lookups, 3) if lookups else 0.0
+        }
@@ -0,0 +1,181 @@
+"""
+Central window scheduler
+One timer heap tracks when every session's transcript window is next due and
+hands due windows to a bounded worker pool, replacing a sleep-loop task per
+session. It also reaps sessions that have gone idle.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+async def wait_event(event, timeout):
+    """
+    Wait until event is set or timeout seconds pass, whichever comes first
+    A timer rather than wait_for(): on 3.11 wait_for can swallow a cancel that lands
+    as the timeout fires, which leaves whoever is cancelling the waiter blocked forever
+    """
+    timer = asyncio.get_running_loop().call_later(max(0.0, timeout), event.set)
+    try:
+        await event.wait()
+    finally:
+        timer.cancel()
+
+
+class WindowScheduler:
+    """
+    process(session_id) is awaited by a worker when a session's window is due;
+    reap(session_id) is awaited for sessions idle_since(session_id) says are abandoned.
+    sweep(now), if given, runs on the same interval for other periodic housekeeping.
+    A session is never processed by two workers at once: if it comes due again while
+    in flight, it runs once more right after the current run finishes.
+    priority(session_id), if given, orders due windows (lower first) instead of FIFO, and
+    windows at or below urgent_priority don't wait for a worker: when every worker is busy
+    (e.g. holding routine windows queued at the governor) they run on one of at most
+    max_overflow extra tasks, and queue first in line once those are taken too.
+    """
+
+    def __init__(self, process, reap, idle_candidates, workers=32, idle_ttl=900.0, reap_interval=30.0,
+                 sweep=None, priority=None, urgent_priority=None, max_overflow=8):
+        self.process = process
+        self.reap = reap
+        self.idle_candidates = idle_candidates  # callable(cutoff) -> session ids idle since before cutoff
+        self.sweep = sweep
+        self.workers = workers
+        self.idle_ttl = idle_ttl
+        self.reap_interval = reap_interval
+        self.priority = priority
+        self.urgent_priority = urgent_priority
+        self.max_overflow = max_overflow
+
+        self.heap = []  # (due_at, seq, session_id); stale entries are skipped lazily
+        self.due = {}  # session_id -> current due_at
+        self.in_flight = set()
+        self.rerun = set()
+        self.ready = asyncio.PriorityQueue()  # (priority, seq, session_id)
+        self.busy = 0  # windows being processed, by workers and extra tasks
+        self.extra = set()  # extra tasks running urgent windows
+        self.wakeup = asyncio.Event()
+        self._seq = itertools.count()
+        self.tasks = []
+        self.next_reap_at = 0.0
+
+        self.stats = {
+            'dispatched': 0,
+            'errors': 0,
+            'reaped': 0,
+            'overflow': 0,
+        }
+
+    def start(self):
+        """Start the timer loop and worker pool (idempotent, needs a running loop)"""
+        if self.tasks:
+            return
+        self.next_reap_at = time.monotonic() + self.reap_interval
+        self.tasks = [asyncio.create_task(self._timer_loop())]
+        self.tasks += [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"⏱️  Window scheduler started ({self.workers} workers, idle TTL {self.idle_ttl}s)")
+
+    async def close(self):
+        tasks = self.tasks + list(self.extra)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.tasks = []
+        self.extra.clear()
+
+    def schedule(self, session_id, due_at):
+        """(Re)schedule a session's window; an earlier deadline replaces a later one"""
+        self.start()
+        current = self.due.get(session_id)
+        if current is not None and current <= due_at:
+            return
+        self.due[session_id] = due_at
+        heapq.heappush(self.heap, (due_at, next(self._seq), session_id))
+        if self.heap[0][2] == session_id:
+            self.wakeup.set()
+
+    def cancel(self, session_id):
+        self.due.pop(session_id, None)
+        self.rerun.discard(session_id)
+
+    def pending(self):
+        return len(self.due)
+
+    async def _timer_loop(self):
+        while True:
+            now = time.monotonic()
+            while self.heap and self.heap[0][0] <= now:
+                due_at, _, session_id = heapq.heappop(self.heap)
+                if self.due.get(session_id) != due_at:
+                    continue  # superseded or cancelled
+                del self.due[session_id]
+                if session_id in self.in_flight:
+                    self.rerun.add(session_id)
+                else:
+                    self.in_flight.add(session_id)
+                    self._enqueue(session_id)
+
+            if now >= self.next_reap_at:
+                self.next_reap_at = now + self.reap_interval
+                for session_id in self.idle_candidates(now - self.idle_ttl):
+                    logger.warning(f"🧹 Reaping idle session {session_id} (no activity for {self.idle_ttl}s)")
+                    self.stats['reaped'] += 1
+                    self.cancel(session_id)
+                    asyncio.create_task(self.reap(session_id))
+                if self.sweep is not None:
+                    try:
+                        self.sweep(now)
+                    except Exception as e:
+                        logger.error(f"Error in scheduler sweep: {e}")
+
+            timeout = self.next_reap_at - now
+            if self.heap:
+                timeout = min(timeout, self.heap[0][0] - now)
+            self.wakeup.clear()
+            await wait_event(self.wakeup, timeout)
+
+    def _enqueue(self, session_id):
+        priority = self.priority(session_id) if self.priority is not None else 0
+        if (self.urgent_priority is not None and priority <= self.urgent_priority
+                and self.busy >= self.workers and len(self.extra) < self.max_overflow):
+            self.stats['overflow'] += 1
+            task = asyncio.create_task(self._run(session_id))
+            self.extra.add(task)
+            task.add_done_callback(self.extra.discard)
+            return
+        self.ready.put_nowait((priority, next(self._seq), session_id))
+
+    async def _worker(self):
+        while True:
+            _, _, session_id = await self.ready.get()
+            await self._run(session_id)
+
+    async def _run(self, session_id):
+        self.busy += 1
+        try:
+            self.stats['dispatched'] += 1
+            await self.process(session_id)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Error processing window for {session_id}: {e}")
+        finally:
+            self.busy -= 1
+            self.in_flight.discard(session_id)
+            if session_id in self.rerun:
+                self.rerun.discard(session_id)
+                self.in_flight.add(session_id)
+                self._enqueue(session_id)
+
+    def snapshot(self):
+        return {
+            **self.stats,
+            'scheduled': len(self.due),
+            'in_flight': len(self.in_flight),
+            'queued': self.ready.qsize(),
+            'busy': self.busy,
+        }
@@ -0,0 +1,184 @@
+"""
+Adaptive transcript windowing
+Decides when a session's buffered transcript should be sent for analysis,
+instead of waking up on a fixed 10-second timer
+"""
+import collections
+import os
+import time
+
+from codeword_matcher import tokenize
+
+# Words/phrases that make a window worth analysing right away
+RISK_TERMS = (
+    'help', 'stop', 'scared', 'afraid', 'hurt', 'police', 'gun', 'knife',
+    'kill', 'leave me alone', 'let me go', "don't touch", 'get away', 'please no',
+)
+
+
+class WindowPolicy:
+    """Flush triggers for a transcript window (all times in seconds)"""
+
+    def __init__(self, max_words=60, max_chars=400, silence_gap=2.5, min_words=4,
+                 max_age=10.0, overlap_words=8, risk_terms=RISK_TERMS,
+                 max_bytes=16384, overflow='summarize'):
+        self.max_words = max_words
+        self.max_chars = max_chars
+        self.silence_gap = silence_gap
+        self.min_words = min_words
+        self.max_age = max_age
+        self.overlap_words = overlap_words
+        # Hard cap on buffered text if analysis stalls: 'drop' the oldest phrases, or
+        # 'summarize' them into a short marker that keeps their count and risk words
+        self.max_bytes = max_bytes
+        self.overflow = overflow
+        self.risk_single = {t for t in risk_terms if ' ' not in t}
+        self.risk_phrases = [' '.join(tokenize(t)) for t in risk_terms if ' ' in t]
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_words=int(os.getenv('WINDOW_MAX_WORDS', '60')),
+            max_chars=int(os.getenv('WINDOW_MAX_CHARS', '400')),
+            silence_gap=float(os.getenv('WINDOW_SILENCE_SECONDS', '2.5')),
+            min_words=int(os.getenv('WINDOW_MIN_WORDS', '4')),
+            max_age=float(os.getenv('WINDOW_MAX_AGE_SECONDS', '10')),
+            overlap_words=int(os.getenv('WINDOW_OVERLAP_WORDS', '8')),
+            max_bytes=int(os.getenv('WINDOW_MAX_BYTES', '16384')),
+            overflow=os.getenv('WINDOW_OVERFLOW_POLICY', 'summarize'),
+        )
+
+    def is_risky(self, text):
+        return bool(self.risk_terms_in(text))
+
+    def risk_terms_in(self, text):
+        tokens = tokenize(text)
+        found = [t for t in tokens if t in self.risk_single]
+        joined = ' '.join(tokens)
+        found.extend(p for p in self.risk_phrases if p in joined)
+        return found
+
+
+class TranscriptWindow:
+    """
+    Buffered transcript for one session plus the bookkeeping for its flush triggers
+    The last few words of each flushed window are carried into the next one so a
+    phrase split across the boundary is still seen whole by the agents.
+    Stored text is a ring buffer capped at policy.max_bytes
+    """
+
+    __slots__ = ('policy', 'phrases', 'bytes', 'words', 'chars', 'first_at', 'last_at',
+                 'risky', 'urgent', 'carry', 'overflowed', 'overflow_risk_terms')
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.phrases = collections.deque()
+        self.bytes = 0  # UTF-8 size of the phrases currently held
+        self.words = 0
+        self.chars = 0
+        self.first_at = None
+        self.last_at = None
+        self.risky = False
+        self.urgent = False  # a codeword near miss: analyze now, ahead of everything else
+        self.carry = []  # overlap words from the previous window
+        self.overflowed = 0  # phrases evicted by the byte cap since the last flush
+        self.overflow_risk_terms = set()
+
+    def __len__(self):
+        return len(self.phrases)
+
+    def add(self, text, now=None):
+        now = time.monotonic() if now is None else now
+        if not self.phrases:
+            self.first_at = now
+        self.phrases.append(text)
+        self.bytes += len(text.encode('utf-8'))
+        self.words += len(text.split())
+        self.chars += len(text)
+        self.last_at = now
+        if self.policy.is_risky(text):
+            self.risky = True
+        while self.bytes > self.policy.max_bytes and len(self.phrases) > 1:
+            self._evict_oldest()
+
+    def mark_urgent(self):
+        """Flush on the next check and analyze at critical priority"""
+        self.urgent = True
+
+    def _evict_oldest(self):
+        oldest = self.phrases.popleft()
+        self.bytes -= len(oldest.encode('utf-8'))
+        self.overflowed += 1
+        if self.policy.overflow == 'summarize':
+            self.overflow_risk_terms.update(self.policy.risk_terms_in(oldest))
+
+    def due(self, now=None):
+        """Reason the window should be flushed now, or None"""
+        if not self.phrases:
+            return None
+        now = time.monotonic() if now is None else now
+        p = self.policy
+        if self.urgent:
+            return 'codeword'
+        if self.risky:
+            return 'risk'
+        if self.words >= p.max_words or self.chars >= p.max_chars:
+            return 'size'
+        if now - self.first_at >= p.max_age:
+            return 'max_age'
+        if self.words >= p.min_words and now - self.last_at >= p.silence_gap:
+            return 'silence'
+        return None
+
+    def next_due_at(self):
+        """Monotonic time the window should next be checked (None = nothing buffered)"""
+        if not self.phrases:
+            return None
+        p = self.policy
+        if self.urgent or self.risky or self.words >= p.max_words or self.chars >= p.max_chars:
+            return self.last_at
+        deadline = self.first_at + p.max_age
+        if self.words >= p.min_words:
+            deadline = min(deadline, self.last_at + p.silence_gap)
+        return deadline
+
+    def requeue(self, conversation, first_at):
+        """
+        Put back a window whose analysis was shed, ahead of anything heard since,
+        so it is merged into the next flush instead of being lost
+        """
+        # The shed conversation already starts with the previous carry
+        self.carry = []
+        self.phrases.appendleft(conversation)
+        self.bytes += len(conversation.encode('utf-8'))
+        self.words += len(conversation.split())
+        self.chars += len(conversation)
+        self.first_at = first_at if self.first_at is None else min(first_at, self.first_at)
+        if self.last_at is None:
+            self.last_at = first_at
+        if self.policy.is_risky(conversation):
+            self.risky = True
+        while self.bytes > self.policy.max_bytes and len(self.phrases) > 1:
+            self._evict_oldest()
+
+    def take(self):
+        """Return (conversation text, phrase count) and reset, keeping the overlap tail"""
+        new_text = " ".join(self.phrases)
+        if self.overflowed and self.policy.overflow == 'summarize':
+            risk = ', '.join(sorted(self.overflow_risk_terms)) or 'none'
+            new_text = f"[{self.overflowed} earlier phrases omitted; risk words in them: {risk}] {new_text}"
+        conversation = " ".join(self.carry + [new_text]) if self.carry else new_text
+        count = len(self.phrases) + self.overflowed
+        if self.policy.overlap_words:
+            self.carry = conversation.split()[-self.policy.overlap_words:]
+        self.phrases.clear()
+        self.bytes = 0
+        self.overflowed = 0
+        self.overflow_risk_terms = set()
+        self.words = 0
+        self.chars = 0
+        self.first_at = None
+        self.last_at = None
+        self.risky = False
+        self.urgent = False
+        return conversation, count
@@ -25,6 +25,7 @@ export const config = {
   USER_PHONE_NUMBER: process.env.USER_PHONE_NUMBER,
   PANIC_CODEWORD: process.env.PANIC_CODEWORD || 'help me mom',
   PYTHON_SERVICE_URL: process.env.PYTHON_SERVICE_URL || 'http://localhost:5000',
+  PYTHON_IPC_SOCKET: process.env.IPC_SOCKET_PATH,
 };
 
 console.log('✅ Configuration loaded successfully');
@@ -3,17 +3,31 @@ import { WebSocketServer } from 'ws';
 import axios from 'axios';
 import { config } from '../config.js';
 import twilioCaller from '../services/twilio-caller.js';
+import PythonIpc from '../services/python-ipc.js';
 
 const router = express.Router();
 
 // Store active WebSocket connections
 const activeConnections = new Map();
 
+// Incidents that already triggered a call (incident_id -> time), so a retried or
+// repeated alert for the same incident never places a second call
+const handledIncidents = new Map();
+const HANDLED_INCIDENT_TTL_MS = 60 * 60 * 1000;
+
+// Optional Unix socket to the Python service: commands and media go out and events
+// come back on it while it is connected; HTTP (and the webhook below) otherwise
+const pythonIpc = config.PYTHON_IPC_SOCKET ? new PythonIpc(config.PYTHON_IPC_SOCKET) : null;
+pythonIpc?.on('event', (event) => {
+  handlePythonEvent(event).catch((error) => console.error('Error handling Python event:', error));
+});
+
 // Create WebSocket server (will be attached to HTTP server)
 export function setupWebSocket(server) {
   const wss = new WebSocketServer({ server, path: '/ws/live-session' });
 
   console.log('📡 WebSocket server created at /ws/live-session');
+  pythonIpc?.connect();
 
   wss.on('connection', (ws, req) => {
     const sessionId = `session_${Date.now()}`;
@@ -86,11 +100,17 @@ async function handleStartRecording(sessionId, ws) {
 
   try {
     // Start Python Gemini Live session
-    const response = await axios.post(`${config.PYTHON_SERVICE_URL}/session/start`, {
-      session_id: sessionId
-    });
+    let result;
+    if (pythonIpc?.connected) {
+      result = await pythonIpc.request({ op: 'start', session_id: sessionId });
+      if (result.status === 'error') throw new Error(result.error);
+    } else {
+      result = (await axios.post(`${config.PYTHON_SERVICE_URL}/session/start`, {
+        session_id: sessionId
+      })).data;
+    }
 
-    console.log(`✅ Python session started:`, response.data);
+    console.log(`✅ Python session started:`, result);
 
     // Start listening for codeword detections from Python
     startListeningForCodeword(sessionId, ws);
@@ -115,6 +135,7 @@ async function handleAudioChunk(sessionId, audioData) {
     const audioBuffer = Buffer.from(audioData, 'base64');
 
     // Forward to Python service
+    if (pythonIpc?.send({ op: 'audio', session_id: sessionId }, audioBuffer)) return;
     await axios.post(
       `${config.PYTHON_SERVICE_URL}/session/${sessionId}/audio`,
       audioBuffer,
@@ -137,6 +158,7 @@ async function handleVideoChunk(sessionId, videoData) {
     const videoBuffer = Buffer.from(videoData, 'base64');
 
     // Send to Python service (will extract audio and send to Gemini)
+    if (pythonIpc?.send({ op: 'video', session_id: sessionId }, videoBuffer)) return;
     await axios.post(
       `${config.PYTHON_SERVICE_URL}/session/${sessionId}/video`,
       videoBuffer,
@@ -156,15 +178,19 @@ async function handleTriggerCodeword(sessionId, text) {
 
   try {
     // Send text to Python service
-    await axios.post(
-      `${config.PYTHON_SERVICE_URL}/session/${sessionId}/text`,
-      { text },
-      {
-        headers: {
-          'Content-Type': 'application/json'
+    if (pythonIpc?.connected) {
+      await pythonIpc.request({ op: 'text', session_id: sessionId, text });
+    } else {
+      await axios.post(
+        `${config.PYTHON_SERVICE_URL}/session/${sessionId}/text`,
+        { text },
+        {
+          headers: {
+            'Content-Type': 'application/json'
+          }
         }
-      }
-    );
+      );
+    }
     console.log(`✅ Text sent to Gemini`);
   } catch (error) {
     console.error(`Error sending text for ${sessionId}:`, error.message);
@@ -175,7 +201,11 @@ async function handleStopRecording(sessionId) {
   console.log(`⏹️  Stopping recording session: ${sessionId}`);
 
   try {
-    await axios.post(`${config.PYTHON_SERVICE_URL}/session/${sessionId}/stop`);
+    if (pythonIpc?.connected) {
+      await pythonIpc.request({ op: 'stop', session_id: sessionId });
+    } else {
+      await axios.post(`${config.PYTHON_SERVICE_URL}/session/${sessionId}/stop`);
+    }
     console.log(`✅ Python session stopped`);
   } catch (error) {
     console.error('Error stopping Python session:', error.message);
@@ -190,15 +220,19 @@ function startListeningForCodeword(sessionId, ws) {
   console.log(`👂 Listening for codeword in session ${sessionId}`);
 }
 
-// Webhook endpoint for Python to notify about analysis events
-router.post('/codeword-detected', async (req, res) => {
-  const { type, session_id, detected_phrase, confidence, timestamp, danger_score, agent_scores } = req.body;
+// Analysis and detection events from Python (webhook or IPC socket);
+// resolves to the HTTP status and body the webhook answers with
+async function handlePythonEvent(event) {
+  const {
+    type, session_id, detected_phrase, confidence, timestamp, danger_score, agent_scores,
+    incident_id, sources, detections, sequence
+  } = event;
 
   // Get the WebSocket connection for this session
   const ws = activeConnections.get(session_id);
 
   if (!ws || ws.readyState !== 1) {
-    return res.status(404).json({ error: 'WebSocket not found or not open' });
+    return { status: 404, body: { error: 'WebSocket not found or not open' } };
   }
 
   // Handle different event types
@@ -208,7 +242,7 @@ router.post('/codeword-detected', async (req, res) => {
       type: 'analysis_started',
       sessionId: session_id
     }));
-    return res.json({ status: 'notified' });
+    return { status: 200, body: { status: 'notified' } };
   }
 
   if (type === 'analysis_complete') {
@@ -219,7 +253,34 @@ router.post('/codeword-detected', async (req, res) => {
       dangerScore: danger_score,
       agentScores: agent_scores
     }));
-    return res.json({ status: 'notified' });
+    return { status: 200, body: { status: 'notified' } };
+  }
+
+  if (type === 'incident_update') {
+    // More detections for an incident that already alerted: refresh the UI, no new call
+    console.log(`🔁 Incident ${incident_id} update #${sequence} for session ${session_id}: ${sources.join(', ')}`);
+    ws.send(JSON.stringify({
+      type: 'incident_update',
+      sessionId: session_id,
+      incidentId: incident_id,
+      sources: sources,
+      detections: detections,
+      confidence: confidence,
+      agentScores: event.agentScores
+    }));
+    return { status: 200, body: { status: 'notified' } };
+  }
+
+  if (incident_id) {
+    const now = Date.now();
+    for (const [id, handledAt] of handledIncidents) {
+      if (now - handledAt > HANDLED_INCIDENT_TTL_MS) handledIncidents.delete(id);
+    }
+    if (handledIncidents.has(incident_id)) {
+      console.log(`🔇 Incident ${incident_id} already handled; not calling again`);
+      return { status: 200, body: { status: 'duplicate', session_id } };
+    }
+    handledIncidents.set(incident_id, now);
   }
 
   // Original codeword detection (danger ≥70%)
@@ -278,7 +339,13 @@ router.post('/codeword-detected', async (req, res) => {
     }
   }
 
-  res.json({ status: 'processed', session_id });
+  return { status: 200, body: { status: 'processed', session_id } };
+}
+
+// Webhook endpoint for Python to notify about analysis events
+router.post('/codeword-detected', async (req, res) => {
+  const { status, body } = await handlePythonEvent(req.body);
+  res.status(status).json(body);
 });
 
 // Twilio voice webhook (serves TwiML)
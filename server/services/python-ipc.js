@@ -0,0 +1,165 @@
+import net from 'net';
+import { EventEmitter } from 'events';
+
+// Unix domain socket client for the Python service (see python/ipc_socket.py).
+// Frame: u8 codec | u32 header length | u32 payload length | header | payload.
+// Headers are msgpack when both sides have it (negotiated in hello), else JSON;
+// media goes in the payload as raw bytes.
+const PREFIX_SIZE = 9;
+const CODEC_JSON = 0;
+const CODEC_MSGPACK = 1;
+
+let msgpack = null;
+try {
+  msgpack = await import('@msgpack/msgpack');
+} catch {
+  // Optional: JSON headers work without it
+}
+
+class PythonIpc extends EventEmitter {
+  constructor(path, { requestTimeoutMs = 15000, reconnectMs = 1000 } = {}) {
+    super();
+    this.path = path;
+    this.requestTimeoutMs = requestTimeoutMs;
+    this.reconnectMs = reconnectMs;
+    this.socket = null;
+    this.connected = false;  // true once hello has been answered
+    this.codec = CODEC_JSON;
+    this.buffer = Buffer.alloc(0);
+    this.pending = new Map();  // request id -> { resolve, reject, timer }
+    this.nextId = 0;
+    this.closed = false;
+    this.warned = false;
+  }
+
+  connect() {
+    if (this.socket || this.closed) return;
+
+    const socket = net.createConnection(this.path);
+    this.socket = socket;
+
+    socket.on('connect', async () => {
+      this.warned = false;
+      try {
+        // Hello goes out as JSON; switch to msgpack if Python has it too
+        const reply = await this.request({ op: 'hello', events: true }, null, true);
+        if (msgpack && reply.codecs.includes('msgpack')) this.codec = CODEC_MSGPACK;
+        this.connected = true;
+        console.log(`🔌 Connected to Python over IPC socket ${this.path} (${this.codec === CODEC_MSGPACK ? 'msgpack' : 'JSON'} headers)`);
+        this.emit('connected');
+      } catch (error) {
+        console.error('IPC hello failed:', error.message);
+        socket.destroy();
+      }
+    });
+
+    socket.on('data', (chunk) => this.onData(chunk));
+
+    socket.on('error', (error) => {
+      if (!this.warned) {
+        console.warn(`⚠️  Python IPC socket unavailable (${error.code || error.message}); using HTTP until it is back`);
+        this.warned = true;
+      }
+    });
+
+    socket.on('close', () => {
+      const wasConnected = this.connected;
+      this.socket = null;
+      this.connected = false;
+      this.codec = CODEC_JSON;
+      this.buffer = Buffer.alloc(0);
+      for (const { reject, timer } of this.pending.values()) {
+        clearTimeout(timer);
+        reject(new Error('IPC socket closed'));
+      }
+      this.pending.clear();
+      if (wasConnected) {
+        console.warn('🔌 Python IPC socket closed');
+        this.emit('disconnected');
+      }
+      if (!this.closed) setTimeout(() => this.connect(), this.reconnectMs).unref();
+    });
+  }
+
+  onData(chunk) {
+    this.buffer = this.buffer.length ? Buffer.concat([this.buffer, chunk]) : chunk;
+
+    while (this.buffer.length >= PREFIX_SIZE) {
+      const codec = this.buffer.readUInt8(0);
+      const headerLength = this.buffer.readUInt32BE(1);
+      const payloadLength = this.buffer.readUInt32BE(5);
+      const frameLength = PREFIX_SIZE + headerLength + payloadLength;
+      if (this.buffer.length < frameLength) break;
+
+      const headerBytes = this.buffer.subarray(PREFIX_SIZE, PREFIX_SIZE + headerLength);
+      this.buffer = this.buffer.subarray(frameLength);
+
+      let header;
+      try {
+        header = codec === CODEC_MSGPACK ? msgpack.decode(headerBytes) : JSON.parse(headerBytes.toString());
+      } catch (error) {
+        console.error('Bad IPC frame from Python:', error.message);
+        this.socket?.destroy();
+        return;
+      }
+
+      if (header.op === 'reply') {
+        const request = this.pending.get(header.id);
+        if (request) {
+          this.pending.delete(header.id);
+          clearTimeout(request.timer);
+          request.resolve(header);
+        }
+      } else if (header.op === 'event') {
+        this.emit('event', header.event);
+      }
+    }
+  }
+
+  write(header, payload) {
+    const body = this.codec === CODEC_MSGPACK
+      ? Buffer.from(msgpack.encode(header))
+      : Buffer.from(JSON.stringify(header));
+    const prefix = Buffer.alloc(PREFIX_SIZE);
+    prefix.writeUInt8(this.codec, 0);
+    prefix.writeUInt32BE(body.length, 1);
+    prefix.writeUInt32BE(payload ? payload.length : 0, 5);
+
+    // One write for the whole frame without copying the media payload
+    this.socket.cork();
+    this.socket.write(prefix);
+    this.socket.write(body);
+    if (payload) this.socket.write(payload);
+    process.nextTick(() => this.socket?.uncork());
+  }
+
+  // Command with a reply (mirrors the HTTP endpoint's JSON body)
+  request(header, payload = null, handshake = false) {
+    if (!this.socket || (!this.connected && !handshake)) {
+      return Promise.reject(new Error('IPC socket not connected'));
+    }
+    const id = ++this.nextId;
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(new Error(`IPC ${header.op} timed out`));
+      }, this.requestTimeoutMs);
+      this.pending.set(id, { resolve, reject, timer });
+      this.write({ ...header, id }, payload);
+    });
+  }
+
+  // Fire-and-forget command (media chunks); false if not connected
+  send(header, payload = null) {
+    if (!this.connected) return false;
+    this.write(header, payload);
+    return true;
+  }
+
+  close() {
+    this.closed = true;
+    this.socket?.destroy();
+  }
+}
+
+export default PythonIpc;